@@ -1,13 +1,78 @@
 from .model_utils import (
     load_glove_embeddings,
     get_student_vector,
+    get_student_matrix,
     predict_student,
+    predict_students,
     recommend_jobs,
+    recommend_jobs_batch,
+    embed_jobs,
+    top_k_indices,
+    student_cache_key,
 )
+from .embeddings import (
+    EmbeddingStore,
+    convert_glove_to_store,
+    load_embedding_store,
+)
+from .jobs import (
+    JobCorpus,
+    JobIndex,
+    FilterIndex,
+    job_key,
+)
+from .ann import (
+    ExactSearch,
+    IVFFlatSearch,
+    HNSWSearch,
+    build_searcher,
+    load_searcher,
+)
+from .dedup import NearDuplicateIndex, dedup_jobs
+from .cache import TTLCache
+from .shared import atomic_write, process_memory, share_matrix
+from .warmup import Warmup
+from .metrics import Counter, Gauge, Histogram, MetricsMiddleware, Registry
+from .careers import CareerModel, OnlineCareerModel, keyword_centroids, top_careers, top_careers_batch
 
 __all__ = [
     "load_glove_embeddings",
     "get_student_vector",
+    "get_student_matrix",
     "predict_student",
+    "predict_students",
     "recommend_jobs",
+    "recommend_jobs_batch",
+    "embed_jobs",
+    "top_k_indices",
+    "student_cache_key",
+    "EmbeddingStore",
+    "convert_glove_to_store",
+    "load_embedding_store",
+    "JobCorpus",
+    "JobIndex",
+    "FilterIndex",
+    "job_key",
+    "ExactSearch",
+    "IVFFlatSearch",
+    "HNSWSearch",
+    "build_searcher",
+    "load_searcher",
+    "NearDuplicateIndex",
+    "dedup_jobs",
+    "TTLCache",
+    "atomic_write",
+    "process_memory",
+    "share_matrix",
+    "Warmup",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsMiddleware",
+    "Registry",
+    "CareerModel",
+    "OnlineCareerModel",
+    "keyword_centroids",
+    "top_careers",
+    "top_careers_batch",
 ]
\ No newline at end of file
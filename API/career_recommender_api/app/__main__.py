@@ -0,0 +1,158 @@
+# __main__.py (Offline build commands: `python -m app <command>`)
+
+import argparse
+import json
+import pickle
+import sys
+from .embeddings import (
+    STORE_DTYPES,
+    STORE_MATRIX_SUFFIX,
+    STORE_VOCAB_SUFFIX,
+    convert_glove_to_store,
+    prune_store,
+    write_store,
+)
+from .ann import BACKENDS, build_searcher
+from .dedup import NearDuplicateIndex, dedup_jobs
+from .jobs import JobCorpus
+from .model_utils import load_glove_embeddings, get_student_vector, predict_student, service_vocabulary
+
+JOBS_PATH = "app/linkedin_jobs__morocco_20250516_165349.json"
+
+
+def convert(args):
+    prefix, n_words = convert_glove_to_store(args.glove_file, args.out, args.dim)
+    print(f"Wrote {n_words} vectors to {prefix}{STORE_MATRIX_SUFFIX} / {prefix}{STORE_VOCAB_SUFFIX}")
+
+
+def ranking(prediction):
+    return sorted(prediction, key=lambda career: (-prediction[career], career))
+
+
+def check_rankings(full, pruned, centroids, careers, cases):
+    """Compare predict_student on both stores; returns (mismatches, max abs % diff)."""
+    mismatches, max_diff = [], 0.0
+    for name, skills, interests in cases:
+        before = predict_student(get_student_vector(skills, interests, full), centroids, careers)
+        after = predict_student(get_student_vector(skills, interests, pruned), centroids, careers)
+        max_diff = max(max_diff, max(abs(before[c] - after[c]) for c in careers))
+        if ranking(before) != ranking(after):
+            mismatches.append({"case": name, "before": ranking(before), "after": ranking(after)})
+    return mismatches, max_diff
+
+
+def prune(args):
+    # model.py lives next to the app package; its TEST_CASES are the reference profiles
+    from model import TEST_CASES
+
+    with open(args.model, "rb") as f:
+        model_data = pickle.load(f)
+    with open(args.jobs, "r", encoding="utf-8") as f:
+        job_data = json.load(f)
+
+    full = load_glove_embeddings(args.glove)
+    keep = service_vocabulary(model_data["career_keywords"], job_data)
+    pruned = write_store(args.out, prune_store(full, keep, args.max_rank), args.dtype)
+
+    careers = list(model_data["career_keywords"].keys())
+    mismatches, max_diff = check_rankings(full, pruned, model_data["centroids"], careers, TEST_CASES)
+    print(f"Kept {len(pruned)}/{len(full)} words as {args.dtype} in {args.out}")
+    print(f"Vectors: {full.nbytes / 1e6:.1f} MB -> {pruned.nbytes / 1e6:.1f} MB "
+          f"({full.nbytes / max(pruned.nbytes, 1):.1f}x smaller)")
+    print(f"predict_student on TEST_CASES: max difference {max_diff:.2f} points, "
+          f"{len(mismatches)} ranking change(s)")
+    for mismatch in mismatches:
+        print(f"  {mismatch['case']}: {mismatch['before']} -> {mismatch['after']}")
+    if mismatches:
+        sys.exit(1)
+
+
+def build_ann(args):
+    # Ingest in the same order (and with the same dedup) as app/main.py so the saved keys line up
+    dedup = NearDuplicateIndex(threshold=args.dedup_threshold) if args.dedup_threshold > 0 else None
+    corpus = JobCorpus(load_glove_embeddings(args.glove), dedup=dedup)
+    corpus.ingest_file(args.jobs)
+    corpus.ingest_directory(args.jobs_dir)
+    index = corpus.index
+
+    if args.backend == "ivf":
+        params = {"nlist": args.nlist, "nprobe": args.nprobe}
+    else:
+        params = {"M": args.M, "ef_construction": args.ef_construction, "ef": args.ef}
+    searcher = build_searcher(args.backend, index.matrix, **params)
+    out = args.out or f"app/jobs.{args.backend}.index"
+    searcher.save(out, index.keys)
+    print(f"Built {args.backend} index over {len(index)} jobs -> {out}")
+
+
+def dedup(args):
+    jobs = []
+    for path in args.jobs_files:
+        with open(path, "r", encoding="utf-8") as f:
+            jobs.extend(json.load(f))
+    kept, clusters = dedup_jobs(jobs, NearDuplicateIndex(threshold=args.threshold))
+    report = {
+        "postings": len(jobs),
+        "kept": len(kept),
+        "collapsed": len(jobs) - len(kept),
+        "clusters": len(clusters),
+        "largest": [
+            {"canonical": {k: jobs[c].get(k) for k in ("job_title", "company", "location")},
+             "duplicates": [{k: jobs[i].get(k) for k in ("company", "location")} for i in positions]}
+            for c, positions in sorted(clusters.items(), key=lambda item: -len(item[1]))[:args.examples]
+        ],
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(kept, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app", description="Career recommender build tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("convert", help="convert a GloVe .txt file to the binary store")
+    p.add_argument("glove_file", help="e.g. app/glove.6B.100d.txt")
+    p.add_argument("--out", default=None, help="store prefix (default: input path without .txt)")
+    p.add_argument("--dim", type=int, default=100)
+    p.set_defaults(func=convert)
+
+    p = sub.add_parser("prune", help="prune and quantize the store to the words the service can see")
+    p.add_argument("--glove", default="app/glove.6B.100d.txt", help="full store (or .txt) to prune")
+    p.add_argument("--model", default="app/career_model.pkl")
+    p.add_argument("--jobs", default=JOBS_PATH)
+    p.add_argument("--max-rank", type=int, default=50000,
+                   help="also keep the N most frequent GloVe words (0 keeps only service words)")
+    p.add_argument("--dtype", choices=STORE_DTYPES, default="int8")
+    p.add_argument("--out", default="app/glove.pruned", help="output store prefix")
+    p.set_defaults(func=prune)
+
+    p = sub.add_parser("build-ann", help="build an approximate job-vector index offline")
+    p.add_argument("--backend", choices=[b for b in BACKENDS if b != "exact"], default="ivf")
+    p.add_argument("--glove", default="app/glove.6B.100d.txt")
+    p.add_argument("--jobs", default=JOBS_PATH)
+    p.add_argument("--jobs-dir", default="app/jobs")
+    p.add_argument("--nlist", type=int, default=None, help="ivf: number of lists (default sqrt(n))")
+    p.add_argument("--nprobe", type=int, default=8, help="ivf: lists scanned per query")
+    p.add_argument("--M", type=int, default=16, help="hnsw: graph degree")
+    p.add_argument("--ef-construction", type=int, default=200, help="hnsw: build-time beam width")
+    p.add_argument("--ef", type=int, default=64, help="hnsw: query-time beam width")
+    p.add_argument("--out", default=None, help="default: app/jobs.<backend>.index")
+    p.add_argument("--dedup-threshold", type=float, default=0.8,
+                   help="must match JOBS_DEDUP_THRESHOLD of the API (0 disables)")
+    p.set_defaults(func=build_ann)
+
+    p = sub.add_parser("dedup", help="collapse near-duplicate postings in scraper dumps and report them")
+    p.add_argument("jobs_files", nargs="+", help="scraper JSON dumps, in ingest order")
+    p.add_argument("--threshold", type=float, default=0.8, help="MinHash Jaccard estimate to collapse at")
+    p.add_argument("--examples", type=int, default=10, help="largest clusters to list in the report")
+    p.add_argument("--out", default=None, help="write the canonical postings here as JSON")
+    p.set_defaults(func=dedup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
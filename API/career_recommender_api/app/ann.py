@@ -0,0 +1,185 @@
+# ann.py (Job-vector search backends)
+#
+# Every backend answers `search(query, k) -> row ids` over the unit-length
+# rows of a job matrix, best first, and `extended(matrix)` returns a backend
+# covering rows appended to that matrix (the JobCorpus hot-reload path).
+#   exact  brute-force cosine, the reference for recall
+#   ivf    inverted file: spherical k-means lists, only `nprobe` lists scanned
+#   hnsw   graph index from the optional `hnswlib` package
+
+import copy
+import json
+import numpy as np
+
+from .model_utils import top_k_indices
+from .shared import atomic_write
+
+try:
+    import hnswlib
+except ImportError:  # optional dependency, only needed for backend="hnsw"
+    hnswlib = None
+
+
+# ---- Exact ----
+class ExactSearch:
+    name = "exact"
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def search(self, query, k):
+        return top_k_indices(self.matrix @ query, k)
+
+    def extended(self, matrix):
+        return ExactSearch(matrix)
+
+
+# ---- IVF-Flat ----
+def _nearest_lists(matrix, centroids, chunk_size=65536):
+    assignments = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), chunk_size):
+        assignments[start:start + chunk_size] = np.argmax(matrix[start:start + chunk_size] @ centroids.T, axis=1)
+    return assignments
+
+
+def train_ivf_centroids(matrix, nlist, n_iter=10, sample=100_000, seed=0):
+    # Spherical k-means on a sample: rows are unit length, so the nearest list
+    # is the one with the largest dot product
+    rng = np.random.default_rng(seed)
+    nlist = max(1, min(nlist, len(matrix)))
+    train = matrix[rng.choice(len(matrix), min(sample, len(matrix)), replace=False)]
+    centroids = train[rng.choice(len(train), nlist, replace=False)].astype(np.float32)
+    for _ in range(n_iter):
+        assignments = _nearest_lists(train, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, train)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # Empty lists keep their previous centroid
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+    return centroids
+
+
+class IVFFlatSearch:
+    name = "ivf"
+
+    def __init__(self, matrix, centroids, assignments, nprobe=8):
+        self.matrix = matrix
+        self.centroids = centroids
+        self.assignments = assignments
+        self.nprobe = nprobe
+        # Row ids grouped by list: list j is order[offsets[j]:offsets[j + 1]]
+        self.order = np.argsort(assignments, kind="stable")
+        self.offsets = np.searchsorted(assignments[self.order], np.arange(len(centroids) + 1))
+
+    @classmethod
+    def build(cls, matrix, nlist=None, nprobe=8, n_iter=10, seed=0):
+        nlist = nlist or max(1, int(np.sqrt(len(matrix))))
+        centroids = train_ivf_centroids(matrix, nlist, n_iter=n_iter, seed=seed)
+        return cls(matrix, centroids, _nearest_lists(matrix, centroids), nprobe)
+
+    def search(self, query, k):
+        probes = top_k_indices(self.centroids @ query, self.nprobe)
+        candidates = np.concatenate([self.order[self.offsets[j]:self.offsets[j + 1]] for j in probes])
+        return candidates[top_k_indices(self.matrix[candidates] @ query, k)]
+
+    def extended(self, matrix):
+        new_rows = _nearest_lists(matrix[len(self.assignments):], self.centroids)
+        return IVFFlatSearch(matrix, self.centroids, np.concatenate([self.assignments, new_rows]), self.nprobe)
+
+    def save(self, path, keys):
+        atomic_write(path, lambda f: np.savez(f, centroids=self.centroids, assignments=self.assignments,
+                                              keys=np.array(keys)))
+
+    @classmethod
+    def load(cls, path, matrix, keys, nprobe=8):
+        data = np.load(path)
+        saved_keys = data["keys"].tolist()
+        if keys[:len(saved_keys)] == saved_keys:
+            # Same corpus (possibly grown since the build): reuse the lists
+            index = cls(matrix[:len(saved_keys)], data["centroids"], data["assignments"], nprobe)
+            return index.extended(matrix)
+        return cls(matrix, data["centroids"], _nearest_lists(matrix, data["centroids"]), nprobe)
+
+
+# ---- HNSW ----
+class HNSWSearch:
+    name = "hnsw"
+
+    def __init__(self, matrix, index, ef=64):
+        self.matrix = matrix
+        self.index = index
+        self.ef = ef
+        self.index.set_ef(ef)
+
+    @staticmethod
+    def _require_hnswlib():
+        if hnswlib is None:
+            raise ImportError("backend 'hnsw' needs the optional hnswlib package (pip install hnswlib)")
+
+    @classmethod
+    def build(cls, matrix, M=16, ef_construction=200, ef=64):
+        cls._require_hnswlib()
+        index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+        index.init_index(max_elements=max(len(matrix), 1), M=M, ef_construction=ef_construction)
+        if len(matrix):
+            index.add_items(matrix, np.arange(len(matrix)))
+        return cls(matrix, index, ef)
+
+    def search(self, query, k):
+        k = min(k, self.index.get_current_count())
+        if k == 0:
+            return np.zeros(0, dtype=np.intp)
+        labels, _ = self.index.knn_query(query, k=k)
+        return labels[0].astype(np.intp)
+
+    def extended(self, matrix):
+        if len(matrix) <= self.index.get_current_count():
+            # Nothing to insert: share the graph rather than copy it
+            return HNSWSearch(matrix, self.index, self.ef)
+        # Copy so readers of the current snapshot never see a graph mid-insert
+        return HNSWSearch(matrix, self._add_rows(copy.deepcopy(self.index), matrix), self.ef)
+
+    @staticmethod
+    def _add_rows(index, matrix):
+        start = index.get_current_count()
+        index.resize_index(len(matrix))
+        index.add_items(matrix[start:], np.arange(start, len(matrix)))
+        return index
+
+    def save(self, path, keys):
+        # hnswlib writes by path: into the temporary file atomic_write opened
+        atomic_write(path, lambda f: self.index.save_index(f.name))
+        atomic_write(path + ".keys.json", lambda f: json.dump(keys, f), mode="w")
+
+    @classmethod
+    def load(cls, path, matrix, keys, ef=64):
+        cls._require_hnswlib()
+        with open(path + ".keys.json", "r", encoding="utf-8") as f:
+            saved_keys = json.load(f)
+        if keys[:len(saved_keys)] != saved_keys:
+            # A dump was removed or reordered, or the dedup threshold differs
+            # from the build's: the graph's labels no longer match the rows
+            print(f"{path} was built for a different job corpus, rebuilding the hnsw index "
+                  f"(run `python -m app build-ann` to avoid this at startup)")
+            return cls.build(matrix, ef=ef)
+        index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+        index.load_index(path, max_elements=max(len(saved_keys), 1))
+        if len(matrix) > len(saved_keys):
+            # No reader has this graph yet: rows added since the build go straight in
+            cls._add_rows(index, matrix)
+        return cls(matrix, index, ef)
+
+
+BACKENDS = {"exact": ExactSearch, "ivf": IVFFlatSearch, "hnsw": HNSWSearch}
+
+
+def build_searcher(backend, matrix, **params):
+    if backend == "exact":
+        return ExactSearch(matrix)
+    return BACKENDS[backend].build(matrix, **params)
+
+
+def load_searcher(backend, path, matrix, keys, **params):
+    if backend == "exact":
+        return ExactSearch(matrix)
+    return BACKENDS[backend].load(path, matrix, keys, **params)
@@ -0,0 +1,294 @@
+# careers.py (Online career centroid updates)
+
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # unavailable on Windows: updates then only serialize within a process
+    fcntl = None
+
+from .ann import ExactSearch
+from .model_utils import career_floor, career_probabilities, get_student_vector, pairwise_distances, top_k_indices
+from .shared import atomic_write
+
+DEFAULT_PARAMS = {"m": 1.5, "blend": 0.8, "temperature": 0.3}
+
+
+def fuzzy_memberships(X, centroids, m=1.5):
+    # Regularized inverse-distance weights; model.py trains with these too
+    distances = np.maximum(pairwise_distances(X, centroids), 1e-10)
+    weights = distances ** (-2 / (m - 1))
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def keyword_centroids(career_keywords, embeddings):
+    # The career-guided anchors every centroid is blended with
+    return np.array([get_student_vector(keywords, [], embeddings) for keywords in career_keywords.values()])
+
+
+# ---- Career Model Snapshot ----
+class CareerModel:
+    """Immutable centroids + careers + hyperparameters, swapped as a whole."""
+
+    def __init__(self, centroids, career_keywords, params=None, seen=None, updates=0, version=0, searcher=None):
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        self.career_keywords = career_keywords
+        self.careers = list(career_keywords.keys())
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        # Membership weight folded in per career so far (drives the learning rate)
+        self.seen = np.zeros(len(self.careers)) if seen is None else np.asarray(seen, dtype=np.float64)
+        self.updates = updates
+        self.version = version
+        # Nearest-centroid search over `career_search_rows(centroids)` (see top_careers)
+        self.searcher = searcher
+
+    @property
+    def temperature(self):
+        # Models from `python model.py sweep` carry their calibrated temperature
+        return self.params["temperature"]
+
+    @classmethod
+    def load(cls, path, version=0):
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        online = data.get("online", {})
+        return cls(data["centroids"], data["career_keywords"], data.get("params"),
+                   online.get("seen"), online.get("updates", 0), version)
+
+    def save(self, path):
+        data = {
+            "centroids": self.centroids,
+            "career_keywords": self.career_keywords,
+            "params": self.params,
+            "online": {"seen": self.seen, "updates": self.updates},
+        }
+        atomic_write(path, lambda f: pickle.dump(data, f))
+
+
+# ---- Top-k Careers ----
+def career_search_rows(centroids):
+    """Unit rows whose largest inner product with `career_search_query(x)` is
+    the centroid nearest to x, so the job-search backends in app/ann.py can
+    index careers too.
+
+    ||x - c||^2 = ||x||^2 - 2 [x, 1].[c, -||c||^2 / 2], and padding every row
+    to a common norm turns that inner product into a cosine.
+    """
+    rows = np.hstack([centroids, -0.5 * (centroids ** 2).sum(axis=1, keepdims=True)])
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    top = max(float(norms.max()), 1e-12)
+    pad = np.sqrt(np.maximum(top ** 2 - norms ** 2, 0.0))
+    return (np.hstack([rows, pad]) / top).astype(np.float32)
+
+
+def career_search_query(student_vec):
+    query = np.concatenate([student_vec, [1.0, 0.0]])
+    return (query / np.linalg.norm(query)).astype(np.float32)
+
+
+def _top_k_result(careers, ids, distances, temperature):
+    # Softmax over the k nearest equals the full softmax renormalized over
+    # them; the floor is sized for k so it cannot flatten a large taxonomy
+    percentages = career_probabilities(distances, temperature, career_floor(len(ids)))
+    return {careers[i]: round(float(p) * 100, 2) for i, p in zip(ids, percentages)}
+
+
+def top_careers(student_vec, model, k):
+    """The k nearest careers with renormalized percentages, best first."""
+    searcher = model.searcher or ExactSearch(career_search_rows(model.centroids))
+    ids = searcher.search(career_search_query(student_vec), k)
+    distances = np.linalg.norm(student_vec - model.centroids[ids], axis=1)
+    order = np.argsort(distances, kind="stable")
+    return _top_k_result(model.careers, ids[order], distances[order], model.temperature)
+
+
+def top_careers_batch(student_matrix, model, k, chunk_size=1024):
+    if model.searcher is not None and model.searcher.name != "exact":
+        return [top_careers(vec, model, k) for vec in student_matrix]
+    # Exact: one distance matrix per chunk of students
+    results = []
+    for start in range(0, len(student_matrix), chunk_size):
+        distances = pairwise_distances(student_matrix[start:start + chunk_size], model.centroids)
+        for row in distances:
+            ids = top_k_indices(-row, k)
+            results.append(_top_k_result(model.careers, ids, row[ids], model.temperature))
+    return results
+
+
+# ---- Online Updates ----
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _file_lock(path):
+    # Exclusive lock on `path`.lock, held across the checkpoint's
+    # read-modify-write. The lock file holds a write counter (see _generation):
+    # mtimes are too coarse to tell back-to-back writes apart.
+    if fcntl is None or not path:
+        yield None
+        return
+    with open(path + ".lock", "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _generation(lock):
+    lock.seek(0)
+    text = lock.read().strip()
+    return int(text) if text else 0
+
+
+def _set_generation(lock, generation):
+    lock.seek(0)
+    lock.truncate()
+    lock.write(str(generation))
+    lock.flush()
+
+
+class OnlineCareerModel:
+    """Folds batches of observed student vectors into the current centroids.
+
+    Each career j keeps a data-driven centroid d_j, with c_j = blend * d_j +
+    (1 - blend) * anchor_j as in training. A batch moves d_j towards its
+    membership-weighted mean with rate w_j / (prior_weight + seen_j), where
+    w_j is the batch's membership weight for j: the rate decays as evidence
+    accumulates, and `prior_weight` is how many students the trained model
+    counts for. With `checkpoint_path`, every update runs under a file lock
+    shared by all processes: the checkpoint is reloaded first if another
+    process wrote it since, the batch is folded in, and the result is written
+    back, so concurrent workers' updates all accumulate in the checkpoint.
+    Other processes also pick it up between updates through `reload`/`watch`.
+    With `build_searcher(rows)`, each new model gets a career search index
+    over `career_search_rows` of its centroids before it is swapped in.
+
+    An existing checkpoint is resumed instead of `model`, unless it is older
+    than `resume_after` (e.g. the trained model's mtime, so a retrained model
+    is not replaced by centroids refined from its predecessor).
+    """
+
+    def __init__(self, model, anchors, prior_weight=1000.0, checkpoint_path=None, build_searcher=None,
+                 resume_after=None):
+        self.build_searcher = build_searcher
+        self.anchors = np.asarray(anchors, dtype=np.float64)
+        self.prior_weight = prior_weight
+        self.checkpoint_path = checkpoint_path
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._checkpoint_mtime = None
+        self._generation = None
+        self._watcher = None
+        with _file_lock(checkpoint_path) as lock:
+            mtime = _mtime(checkpoint_path) if checkpoint_path else None
+            if mtime is not None and (resume_after is None or mtime > resume_after * 1e9):
+                model = CareerModel.load(checkpoint_path)
+            # A stale checkpoint counts as seen too: only a newer write is reloaded
+            self._checkpoint_mtime = mtime
+            if lock is not None:
+                self._generation = _generation(lock)
+        self.model = self._indexed(model)
+
+    def _indexed(self, model):
+        if self.build_searcher is not None:
+            model.searcher = self.build_searcher(career_search_rows(model.centroids))
+        return model
+
+    def _swap(self, model):
+        self.model = self._indexed(model)
+        for listener in self.listeners:
+            listener(model)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        # Students without a single known token carry no signal
+        X = X[np.linalg.norm(X, axis=1) > 0]
+        if not len(X):
+            current = self.model
+            return {"students": 0, "updates": current.updates, "version": current.version, "checkpointed": False}
+        with self._lock, _file_lock(self.checkpoint_path) as lock:
+            if self.checkpoint_path:
+                # Start from other workers' updates, not just our own
+                self._sync(lock)
+            current = self.model
+
+            blend, m = current.params["blend"], current.params["m"]
+            data = current.centroids if blend == 1 else (current.centroids - (1 - blend) * self.anchors) / blend
+            memberships = fuzzy_memberships(X, current.centroids, m)
+            weight = memberships.sum(axis=0)
+            batch_mean = (memberships.T @ X) / np.maximum(weight, 1e-12)[:, np.newaxis]
+            rate = (weight / (self.prior_weight + current.seen + weight))[:, np.newaxis]
+            data = data + rate * (batch_mean - data)
+
+            model = CareerModel(blend * data + (1 - blend) * self.anchors, current.career_keywords, current.params,
+                                current.seen + weight, current.updates + 1, current.version + 1)
+            checkpointed = bool(self.checkpoint_path)
+            if checkpointed:
+                self._write_checkpoint(model, lock)
+            self._swap(model)
+            return {"students": len(X), "updates": model.updates, "version": model.version,
+                    "checkpointed": checkpointed}
+
+    def checkpoint(self):
+        with self._lock, _file_lock(self.checkpoint_path) as lock:
+            self._write_checkpoint(self.model, lock)
+
+    def _write_checkpoint(self, model, lock):
+        model.save(self.checkpoint_path)
+        self._checkpoint_mtime = _mtime(self.checkpoint_path)
+        if lock is not None:
+            self._generation = _generation(lock) + 1
+            _set_generation(lock, self._generation)
+
+    def _sync(self, lock):
+        # Called holding the file lock: reload the checkpoint if another
+        # process wrote it since this one last wrote or read it
+        if lock is None:
+            self._reload_if_changed(self.checkpoint_path)
+            return
+        generation = _generation(lock)
+        if generation != self._generation and os.path.exists(self.checkpoint_path):
+            self._swap(CareerModel.load(self.checkpoint_path, self.model.version + 1))
+            self._checkpoint_mtime = _mtime(self.checkpoint_path)
+        self._generation = generation
+
+    def _reload_if_changed(self, path):
+        mtime = _mtime(path)
+        if mtime is None or (path == self.checkpoint_path and mtime == self._checkpoint_mtime):
+            return False
+        self._swap(CareerModel.load(path, self.model.version + 1))
+        if path == self.checkpoint_path:
+            self._checkpoint_mtime = mtime
+        return True
+
+    def reload(self, path=None):
+        """Swap in the centroids from `path` (default: the checkpoint) if it changed."""
+        path = path or self.checkpoint_path
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        with self._lock:
+            return self._reload_if_changed(path)
+
+    def watch(self, interval=30.0):
+        """Poll the checkpoint on a daemon thread, e.g. one written by another worker."""
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    if os.path.exists(self.checkpoint_path):
+                        self.reload()
+                except (OSError, EOFError, pickle.UnpicklingError) as e:
+                    print(f"Career model reload failed: {e}")
+
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=poll, name="career-model-watcher", daemon=True)
+            self._watcher.start()
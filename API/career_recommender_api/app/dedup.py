@@ -0,0 +1,109 @@
+# dedup.py (Near-duplicate job postings: MinHash signatures + LSH banding)
+#
+# Scrapes repost the same job with a slightly different company string or
+# location. Two postings are near-duplicates when the estimated Jaccard
+# similarity of their title/skills/description word shingles reaches
+# `threshold`; only the first one seen is kept.
+
+import copy
+import re
+import zlib
+import numpy as np
+
+
+def job_shingles(job, size=3):
+    """Word `size`-grams of title, skills and description.
+
+    Company and location are left out, since they are what reposts vary. They
+    are only used when a posting has no description, because title and skills
+    alone are shared by many distinct jobs.
+    """
+    parts = [job.get("job_title") or "", str(job.get("skills") or ""), job.get("description") or ""]
+    if not parts[2].strip():
+        parts += [job.get("company") or "", job.get("location") or ""]
+    words = re.findall(r"\w+", " ".join(parts).lower())
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """LSH index over MinHash signatures of job postings.
+
+    `bands` x (num_perm / bands) rows: postings whose signatures agree on all
+    rows of any band become candidates, and a candidate is a duplicate when
+    the fraction of equal signature entries (the Jaccard estimate) reaches
+    `threshold`. 16 bands of 8 rows make pairs above ~0.7 Jaccard candidates
+    with high probability.
+    """
+
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, seed=0):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: h_i(x) = ((a_i * x + b_i) mod 2^64) >> 32, with
+        # random 64-bit a_i (odd) and b_i so the products wrap
+        self.a = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64, endpoint=False)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+
+    def empty_like(self):
+        """An empty index with the same hash functions (comparable signatures)."""
+        other = copy.copy(self)
+        other.buckets = [{} for _ in range(self.bands)]
+        other.signatures = {}
+        return other
+
+    def signature(self, job):
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in job_shingles(job)), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, sig):
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find(self, sig):
+        """Key of an indexed posting `sig` duplicates, or None."""
+        checked = set()
+        for band, key in zip(self.buckets, self._band_keys(sig)):
+            for other in band.get(key, ()):
+                if other not in checked:
+                    checked.add(other)
+                    if np.mean(self.signatures[other] == sig) >= self.threshold:
+                        return other
+        return None
+
+    def add(self, key, sig):
+        self.signatures[key] = sig
+        for band, band_key in zip(self.buckets, self._band_keys(sig)):
+            band.setdefault(band_key, []).append(key)
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+def dedup_jobs(jobs, index=None, keys=None):
+    """Split `jobs` into canonical postings and collapsed duplicates.
+
+    Returns (kept, clusters): `clusters` maps the key of each canonical
+    posting that absorbed duplicates to the positions in `jobs` it absorbed.
+    Kept postings are added to `index` (a fresh NearDuplicateIndex by
+    default), so later batches are checked against them too.
+    """
+    index = index if index is not None else NearDuplicateIndex()
+    keys = keys if keys is not None else list(range(len(jobs)))
+    kept, clusters = [], {}
+    for position, (job, key) in enumerate(zip(jobs, keys)):
+        sig = index.signature(job)
+        canonical = index.find(sig)
+        if canonical is None:
+            index.add(key, sig)
+            kept.append(job)
+        else:
+            clusters.setdefault(canonical, []).append(position)
+    return kept, clusters
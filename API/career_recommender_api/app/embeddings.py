@@ -0,0 +1,182 @@
+# embeddings.py (Binary GloVe store)
+#
+# Layout written by `convert_glove_to_store` (`python -m app convert`) for a
+# prefix such as `app/glove.6B.100d`:
+#   <prefix>.npy         matrix, one row per word (memory-mapped at load);
+#                        float32, or float16/int8 for pruned stores
+#   <prefix>.vocab       UTF-8 word list, line i names row i
+#   <prefix>.scales.npy  per-row float32 scales, int8 stores only
+
+import os
+import numpy as np
+
+
+STORE_MATRIX_SUFFIX = ".npy"
+STORE_VOCAB_SUFFIX = ".vocab"
+STORE_SCALES_SUFFIX = ".scales.npy"
+STORE_DTYPES = ("float32", "float16", "int8")
+
+
+# ---- Embedding Store ----
+class EmbeddingStore:
+    """Read-only word -> vector mapping over a single (memory-mapped) matrix.
+
+    Behaves like the dict returned by the old text loader (`in`, `[]`, `get`,
+    `len`), so `get_student_vector` works unchanged.
+    """
+
+    def __init__(self, words, vectors, scales=None, source=None):
+        self.words = words
+        self.vectors = vectors
+        self.scales = scales
+        self.source = source
+        self.index = {word: i for i, word in enumerate(words)}
+        self.dim = vectors.shape[1]
+
+    def __contains__(self, word):
+        return word in self.index
+
+    def __getitem__(self, word):
+        return self.rows(self.index[word])
+
+    def __len__(self):
+        return len(self.words)
+
+    def get(self, word, default=None):
+        i = self.index.get(word)
+        return default if i is None else self.rows(i)
+
+    def rows(self, indices):
+        """float32 vectors for row ids, dequantizing int8 stores."""
+        vectors = np.asarray(self.vectors[indices], dtype=np.float32)
+        if self.scales is not None:
+            vectors = vectors * np.asarray(self.scales[indices], dtype=np.float32)[..., None]
+        return vectors
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+
+def store_paths(prefix):
+    return prefix + STORE_MATRIX_SUFFIX, prefix + STORE_VOCAB_SUFFIX
+
+
+def _replace_atomically(tmp_paths):
+    # Swap files in only once every one of them is complete
+    for tmp in tmp_paths:
+        os.replace(tmp, tmp[: -len(".tmp")])
+
+
+def store_exists(prefix):
+    return all(os.path.exists(p) for p in store_paths(prefix))
+
+
+def store_prefix_for(glove_file_path):
+    """`app/glove.6B.100d.txt` -> `app/glove.6B.100d`."""
+    root, ext = os.path.splitext(glove_file_path)
+    return root if ext == ".txt" else glove_file_path
+
+
+# ---- Text Parsing ----
+def _iter_glove_lines(glove_file_path, dim):
+    with open(glove_file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            values = line.rstrip().split(" ")
+            if len(values) == dim + 1:
+                yield values[0], values[1:]
+
+
+def read_glove_text(glove_file_path, dim=100):
+    words, rows = [], []
+    for word, values in _iter_glove_lines(glove_file_path, dim):
+        words.append(word)
+        rows.append(np.array(values, dtype=np.float32))
+    vectors = np.vstack(rows) if rows else np.zeros((0, dim), dtype=np.float32)
+    return EmbeddingStore(words, vectors, source=os.path.abspath(glove_file_path))
+
+
+# ---- Conversion (one-time) ----
+def convert_glove_to_store(glove_file_path, prefix=None, dim=100):
+    """Stream a GloVe text file into the binary store layout.
+
+    Rows are written straight into a memory-mapped `.npy`, so conversion never
+    holds the whole vocabulary as Python objects.
+    """
+    prefix = prefix or store_prefix_for(glove_file_path)
+    matrix_path, vocab_path = store_paths(prefix)
+
+    n_words = sum(1 for _ in _iter_glove_lines(glove_file_path, dim))
+    matrix = np.lib.format.open_memmap(
+        matrix_path + ".tmp", mode="w+", dtype=np.float32, shape=(n_words, dim)
+    )
+    with open(vocab_path + ".tmp", "w", encoding="utf-8") as vocab:
+        for i, (word, values) in enumerate(_iter_glove_lines(glove_file_path, dim)):
+            matrix[i] = np.asarray(values, dtype=np.float32)
+            vocab.write(word + "\n")
+    matrix.flush()
+    del matrix
+
+    _replace_atomically([matrix_path + ".tmp", vocab_path + ".tmp"])
+    return prefix, n_words
+
+
+# ---- Pruning and Quantization ----
+def prune_store(store, keep_words, max_rank=50000):
+    """Keep `keep_words` plus the `max_rank` most frequent words.
+
+    GloVe files are sorted by corpus frequency, so a word's row number is its
+    frequency rank; the cap keeps common words students may type that never
+    appear in the career keywords or job postings.
+    """
+    keep = {store.index[w] for w in keep_words if w in store.index}
+    keep.update(range(min(max_rank or 0, len(store))))
+    rows = np.array(sorted(keep), dtype=np.intp)
+    return EmbeddingStore([store.words[i] for i in rows], store.rows(rows))
+
+
+def quantize(vectors, dtype="float32"):
+    """Returns (stored matrix, per-row scales or None)."""
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"dtype must be one of {STORE_DTYPES}, got {dtype!r}")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype != "int8":
+        return vectors.astype(dtype), None
+    # Symmetric per-vector scaling: the largest component maps to +/-127
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def write_store(prefix, store, dtype="float32"):
+    matrix_path, vocab_path = store_paths(prefix)
+    scales_path = prefix + STORE_SCALES_SUFFIX
+    vectors, scales = quantize(store.rows(np.arange(len(store))), dtype)
+
+    tmp_paths = [matrix_path + ".tmp", vocab_path + ".tmp"]
+    with open(matrix_path + ".tmp", "wb") as f:
+        np.save(f, vectors)
+    with open(vocab_path + ".tmp", "w", encoding="utf-8") as f:
+        f.writelines(word + "\n" for word in store.words)
+    if scales is not None:
+        with open(scales_path + ".tmp", "wb") as f:
+            np.save(f, scales)
+        tmp_paths.append(scales_path + ".tmp")
+    elif os.path.exists(scales_path):
+        # A float store must not pick up scales left by an earlier int8 build
+        os.remove(scales_path)
+
+    _replace_atomically(tmp_paths)
+    return load_embedding_store(prefix)
+
+
+# ---- Loading ----
+def load_embedding_store(prefix):
+    matrix_path, vocab_path = store_paths(prefix)
+    vectors = np.load(matrix_path, mmap_mode="r")
+    with open(vocab_path, "r", encoding="utf-8") as f:
+        words = f.read().split("\n")[: vectors.shape[0]]
+    scales_path = prefix + STORE_SCALES_SUFFIX
+    scales = np.load(scales_path, mmap_mode="r") if os.path.exists(scales_path) else None
+    return EmbeddingStore(words, vectors, scales, source=os.path.abspath(prefix))
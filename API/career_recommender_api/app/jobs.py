@@ -0,0 +1,241 @@
+# jobs.py (Hot-reloadable job corpus)
+
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+
+from .ann import ExactSearch
+from .model_utils import embed_jobs
+from .shared import matrix_digest, release_matrix, share_matrix
+
+
+# ---- Job Identity ----
+def job_key(job):
+    # Scraper dumps carry no job id, so identify a posting by its content
+    payload = json.dumps(
+        [job.get("job_title"), job.get("company"), job.get("location"), job.get("description")],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+# ---- Inverted Filter Index ----
+FILTER_FIELDS = ("location", "company", "skill")
+
+def filter_terms(field, value):
+    """Index terms of a job field value, or of a query value for that field.
+
+    location: word tokens, so "Casablanca" matches "Casablanca, Casablanca-Settat, Morocco"
+    company:  the whole lower-cased name
+    skill:    each lower-cased skill string
+    """
+    if not value:
+        return []
+    if field == "location":
+        return re.findall(r"\w+", value.lower())
+    if field == "skill":
+        values = [value] if isinstance(value, str) else value
+        return [v.strip().lower() for v in values if v.strip()]
+    return [value.strip().lower()]
+
+
+def _job_terms(job):
+    return {
+        "location": set(filter_terms("location", job.get("location"))),
+        "company": set(filter_terms("company", job.get("company"))),
+        "skill": set(filter_terms("skill", job.get("skills") or [])),
+    }
+
+
+class FilterIndex:
+    """Per-field postings (term -> sorted row ids) for restricting job search."""
+
+    def __init__(self, postings=None):
+        self.postings = postings or {field: {} for field in FILTER_FIELDS}
+
+    def extended(self, jobs, start):
+        # Copy-on-write: only the posting lists that gain rows are rebuilt
+        added = {field: {} for field in FILTER_FIELDS}
+        for row, job in enumerate(jobs, start):
+            for field, terms in _job_terms(job).items():
+                for term in terms:
+                    added[field].setdefault(term, []).append(row)
+
+        postings = {field: dict(self.postings[field]) for field in FILTER_FIELDS}
+        for field, terms in added.items():
+            for term, rows in terms.items():
+                new_rows = np.array(rows, dtype=np.int32)
+                old_rows = postings[field].get(term)
+                postings[field][term] = new_rows if old_rows is None else np.concatenate([old_rows, new_rows])
+        return FilterIndex(postings)
+
+    def rows(self, location=None, company=None, skill=None):
+        """Row ids matching every given filter (all terms within a field too),
+        or None when no filter is given."""
+        matched = None
+        for field, value in (("location", location), ("company", company), ("skill", skill)):
+            for term in filter_terms(field, value):
+                rows = self.postings[field].get(term, np.zeros(0, dtype=np.int32))
+                matched = rows if matched is None else np.intersect1d(matched, rows, assume_unique=True)
+        return matched
+
+
+# ---- Job Index Snapshot ----
+class JobIndex:
+    """Immutable snapshot of the corpus: jobs, their unit-length rows, their
+    keys, the search backend over those rows (see app/ann.py) and the
+    inverted location/company/skill filter index.
+
+    Requests read `corpus.index` once and use that snapshot throughout, so an
+    ingest running concurrently can never hand them a half-built index.
+    """
+
+    def __init__(self, jobs, matrix, keys, version=0, searcher=None, filters=None):
+        self.jobs = jobs
+        self.matrix = matrix
+        self.keys = keys
+        self.version = version
+        self.searcher = searcher or ExactSearch(matrix)
+        self.filters = filters or FilterIndex()
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def extended(self, jobs, matrix, keys, share=None):
+        keys = self.keys + keys
+        matrix = np.vstack([self.matrix, matrix])
+        if share is not None:
+            matrix = share(matrix, keys)
+        return JobIndex(
+            self.jobs + jobs,
+            matrix,
+            keys,
+            self.version + 1,
+            self.searcher.extended(matrix),
+            self.filters.extended(jobs, len(self.jobs)),
+        )
+
+    def with_searcher(self, searcher):
+        return JobIndex(self.jobs, self.matrix, self.keys, self.version + 1, searcher, self.filters)
+
+
+# ---- Job Corpus ----
+class JobCorpus:
+    """Owns the current JobIndex and swaps in a new one after each ingest.
+
+    Only previously unseen jobs are embedded. Writers are serialized by a lock;
+    readers never take it, since replacing `self.index` is a single atomic
+    attribute assignment. With `share_dir`, each job matrix is memory-mapped
+    from a file there so that all workers share one copy (see app/shared.py).
+    With `dedup` (a NearDuplicateIndex, see app/dedup.py), reposts of a job
+    already in the corpus or earlier in the batch are dropped before embedding.
+    """
+
+    def __init__(self, embeddings, share_dir=None, dedup=None):
+        self.embeddings = embeddings
+        self.share_dir = share_dir
+        self.dedup = dedup
+        self.duplicates = 0
+        self.index = JobIndex([], np.zeros((0, embeddings.dim), dtype=np.float32), [])
+        self._lock = threading.Lock()
+        self._seen_keys = set()
+        self._seen_files = {}
+        self._watcher = None
+        self.listeners = []
+
+    def _swap(self, index):
+        previous, self.index = self.index, index
+        if previous.matrix is not index.matrix:
+            release_matrix(previous.matrix)
+        for listener in self.listeners:
+            listener(index)
+
+    def _share(self, matrix, keys):
+        # Same embeddings + same jobs in the same order -> same file in every worker
+        digest = matrix_digest(self.embeddings.source, len(self.embeddings), *keys)
+        return share_matrix(matrix, digest, self.share_dir)
+
+    def ingest(self, jobs):
+        with self._lock:
+            new_jobs, new_keys, batch_keys = [], [], set()
+            for job in jobs:
+                key = job_key(job)
+                if key not in self._seen_keys and key not in batch_keys:
+                    batch_keys.add(key)
+                    new_jobs.append(job)
+                    new_keys.append(key)
+
+            duplicates, signatures = 0, []
+            if self.dedup is not None and new_jobs:
+                new_jobs, new_keys, signatures, duplicates = self._collapse(new_jobs, new_keys)
+
+            if new_jobs:
+                share = self._share if self.share_dir else None
+                self._swap(self.index.extended(new_jobs, embed_jobs(new_jobs, self.embeddings), new_keys, share))
+                for key, sig in zip(new_keys, signatures):
+                    self.dedup.add(key, sig)
+            # Only once the swap succeeded, so a failed ingest can be retried;
+            # collapsed reposts count too, or re-ingesting them recounts them
+            self._seen_keys.update(batch_keys)
+            self.duplicates += duplicates
+            return {"added": len(new_jobs), "skipped": len(jobs) - len(new_jobs) - duplicates,
+                    "duplicates": duplicates, "total": len(self.index)}
+
+    def _collapse(self, jobs, keys):
+        # Check each job against the corpus and against the batch so far
+        batch = self.dedup.empty_like()
+        kept_jobs, kept_keys, signatures = [], [], []
+        for job, key in zip(jobs, keys):
+            sig = self.dedup.signature(job)
+            if self.dedup.find(sig) is None and batch.find(sig) is None:
+                batch.add(key, sig)
+                kept_jobs.append(job)
+                kept_keys.append(key)
+                signatures.append(sig)
+        return kept_jobs, kept_keys, signatures, len(jobs) - len(kept_jobs)
+
+    def set_searcher(self, build):
+        """Swap in a search backend built by `build(index)` for the current jobs."""
+        with self._lock:
+            self._swap(self.index.with_searcher(build(self.index)))
+
+    def ingest_file(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            jobs = json.load(f)
+        result = self.ingest(jobs)
+        self._seen_files[os.path.abspath(path)] = os.path.getmtime(path)
+        return result
+
+    def ingest_directory(self, directory):
+        # New or modified scraper dumps only; unchanged files are not re-read
+        added = skipped = duplicates = files = 0
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            if self._seen_files.get(os.path.abspath(path)) == os.path.getmtime(path):
+                continue
+            result = self.ingest_file(path)
+            added += result["added"]
+            skipped += result["skipped"]
+            duplicates += result["duplicates"]
+            files += 1
+        return {"files": files, "added": added, "skipped": skipped, "duplicates": duplicates,
+                "total": len(self.index)}
+
+    def watch(self, directory, interval=30.0):
+        """Poll `directory` for new scraper output on a daemon thread."""
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.ingest_directory(directory)
+                except (OSError, ValueError) as e:
+                    # A dump may still be mid-write; it is retried on the next poll
+                    print(f"Job corpus reload failed: {e}")
+
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=poll, name="job-corpus-watcher", daemon=True)
+            self._watcher.start()
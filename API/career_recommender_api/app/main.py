@@ -1,54 +1,373 @@
 # main.py (FastAPI Career Recommendation API)
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import pickle
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, Field
 import json
-from typing import List
+import os
+from typing import List, Optional
+try:
+    import orjson
+except ImportError:  # optional dependency, falls back to the json module
+    orjson = None
+
 from app import (
     load_glove_embeddings,
     get_student_vector,
+    get_student_matrix,
     predict_student,
+    predict_students,
     recommend_jobs,
+    recommend_jobs_batch,
+    JobCorpus,
+    NearDuplicateIndex,
+    build_searcher,
+    load_searcher,
+    student_cache_key,
+    TTLCache,
+    process_memory,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    CareerModel,
+    OnlineCareerModel,
+    keyword_centroids,
+    top_careers,
+    top_careers_batch,
+    Warmup,
 )
+from app.embeddings import store_exists
 
 
 # ---- Define Input Schema ----
+class JobFilters(BaseModel):
+    location: Optional[str] = None
+    company: Optional[str] = None
+    skill: Optional[str] = None
+
+    def as_key(self):
+        return (self.location, self.company, self.skill)
+
+
 class StudentInput(BaseModel):
     skills: List[str]
     interests: List[str]
+    filters: Optional[JobFilters] = None
+    # Job fields to return (e.g. ["job_title", "company", "location"]); all by default
+    fields: Optional[List[str]] = None
+    top_n: int = Field(5, ge=1, le=50)
+
+
+class BatchInput(BaseModel):
+    students: List[StudentInput]
+
+
+# ---- Configuration ----
+# GLOVE_PATH may name a text file or a binary store prefix. By default the
+# pruned store written by `python -m app prune` is used when it exists (the
+# Docker image builds it from app/glove.6B.100d.txt), else the full vectors.
+PRUNED_GLOVE_PATH = "app/glove.pruned"
+GLOVE_PATH = os.environ.get("GLOVE_PATH") or (
+    PRUNED_GLOVE_PATH if store_exists(PRUNED_GLOVE_PATH) else "app/glove.6B.100d.txt")
 
+# Centroids are refined online by POST /admin/careers/update. Each update
+# reloads CAREER_CHECKPOINT under a file lock, folds its batch in and writes it
+# back, so updates reaching different workers all accumulate there. A
+# checkpoint newer than the trained model is resumed at startup; with
+# CAREER_WATCH_INTERVAL > 0 every worker also polls it between updates.
+CAREER_MODEL_PATH = "app/career_model.pkl"
+CAREER_CHECKPOINT = os.environ.get("CAREER_CHECKPOINT", "app/career_model.online.pkl")
+CAREER_PRIOR_WEIGHT = float(os.environ.get("CAREER_PRIOR_WEIGHT", "1000"))
+CAREER_WATCH_INTERVAL = float(os.environ.get("CAREER_WATCH_INTERVAL", "0"))
+
+# With a large taxonomy, set CAREER_TOP_K to return only the k nearest careers
+# (0 = all). CAREER_ANN_BACKEND picks how they are found, as for jobs: "exact",
+# "ivf" (CAREER_ANN_NPROBE) or "hnsw" (CAREER_ANN_EF).
+CAREER_TOP_K = int(os.environ.get("CAREER_TOP_K", "0"))
+CAREER_ANN_BACKEND = os.environ.get("CAREER_ANN_BACKEND", "exact")
+CAREER_ANN_PARAMS = {
+    "ivf": {"nprobe": int(os.environ.get("CAREER_ANN_NPROBE", "8"))},
+    "hnsw": {"ef": int(os.environ.get("CAREER_ANN_EF", "64"))},
+}.get(CAREER_ANN_BACKEND, {})
+
+# New scraper dumps dropped into JOBS_DIR are picked up by
+# POST /admin/jobs/reload, or by polling when JOBS_WATCH_INTERVAL > 0 seconds
+JOBS_PATH = "app/linkedin_jobs__morocco_20250516_165349.json"
+JOBS_DIR = os.environ.get("JOBS_DIR", "app/jobs")
+JOBS_WATCH_INTERVAL = float(os.environ.get("JOBS_WATCH_INTERVAL", "0"))
+
+# Job matrices are memory-mapped from JOB_MATRIX_DIR so that all uvicorn
+# workers (`--workers N` / WEB_CONCURRENCY) share a single copy
+JOB_MATRIX_DIR = os.environ.get("JOB_MATRIX_DIR", "app/.shared")
+
+# Reposts (same title/skills/description, different company string or
+# location) are collapsed at ingest when their MinHash Jaccard estimate
+# reaches JOBS_DEDUP_THRESHOLD; 0 disables it (see app/dedup.py)
+JOBS_DEDUP_THRESHOLD = float(os.environ.get("JOBS_DEDUP_THRESHOLD", "0.8"))
+
+# Job search backend: "exact", "ivf" or "hnsw" (see app/ann.py). ANN indexes
+# are built offline with `python -m app build-ann` and loaded from
+# JOB_ANN_INDEX; jobs ingested later are added to the loaded index.
+JOB_ANN_BACKEND = os.environ.get("JOB_ANN_BACKEND", "exact")
+JOB_ANN_INDEX = os.environ.get("JOB_ANN_INDEX", f"app/jobs.{JOB_ANN_BACKEND}.index")
+JOB_ANN_PARAMS = {
+    "ivf": {"nprobe": int(os.environ.get("JOB_ANN_NPROBE", "8"))},
+    "hnsw": {"ef": int(os.environ.get("JOB_ANN_EF", "64"))},
+}.get(JOB_ANN_BACKEND, {})
+
+# ---- Response Cache ----
+# Keyed on the canonical token multisets plus the job index and career model
+# versions; entries are also dropped whenever either changes. Size 0 disables caching.
+response_cache = TTLCache(
+    maxsize=int(os.environ.get("RECOMMEND_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("RECOMMEND_CACHE_TTL", "300")),
+)
 
 # ---- Load Model and Jobs ----
-with open("app/career_model.pkl", "rb") as f:
-    model_data = pickle.load(f)
+# load_models() runs on a background thread started with the app, so uvicorn
+# binds its port at once: /health answers immediately, /ready reports progress
+# and the recommendation endpoints return 503 until every step is done.
+glove = None
+career_model = None
+corpus = None
+warmup = Warmup(["embeddings", "career model", "jobs", "job search index"])
+
 
+def load_models():
+    global glove, career_model, corpus
 
-glove = load_glove_embeddings(model_data["glove_embeddings_path"])
-centroids = model_data["centroids"]
-career_keywords = model_data["career_keywords"]
-careers = list(career_keywords.keys())
+    with warmup.step("embeddings"):
+        embeddings = load_glove_embeddings(GLOVE_PATH)
+
+    with warmup.step("career model"):
+        trained_model = CareerModel.load(CAREER_MODEL_PATH)
+        model = OnlineCareerModel(
+            trained_model,
+            keyword_centroids(trained_model.career_keywords, embeddings),
+            prior_weight=CAREER_PRIOR_WEIGHT,
+            checkpoint_path=CAREER_CHECKPOINT,
+            build_searcher=lambda rows: build_searcher(CAREER_ANN_BACKEND, rows, **CAREER_ANN_PARAMS),
+            resume_after=os.path.getmtime(CAREER_MODEL_PATH),
+        )
+        model.listeners.append(lambda model: response_cache.clear())
+
+    with warmup.step("jobs"):
+        jobs = JobCorpus(
+            embeddings,
+            share_dir=JOB_MATRIX_DIR,
+            dedup=NearDuplicateIndex(threshold=JOBS_DEDUP_THRESHOLD) if JOBS_DEDUP_THRESHOLD > 0 else None,
+        )
+        jobs.ingest_file(JOBS_PATH)
+        jobs.ingest_directory(JOBS_DIR)
+        jobs.listeners.append(lambda index: response_cache.clear())
+
+    with warmup.step("job search index"):
+        if JOB_ANN_BACKEND != "exact":
+            if os.path.exists(JOB_ANN_INDEX):
+                jobs.set_searcher(lambda index: load_searcher(
+                    JOB_ANN_BACKEND, JOB_ANN_INDEX, index.matrix, index.keys, **JOB_ANN_PARAMS))
+            else:
+                print(f"{JOB_ANN_INDEX} not found, building the {JOB_ANN_BACKEND} index at startup")
+                jobs.set_searcher(lambda index: build_searcher(JOB_ANN_BACKEND, index.matrix, **JOB_ANN_PARAMS))
+
+    # Published together, once all of them are complete
+    glove, career_model, corpus = embeddings, model, jobs
+    if CAREER_WATCH_INTERVAL > 0:
+        career_model.watch(CAREER_WATCH_INTERVAL)
+    if JOBS_WATCH_INTERVAL > 0:
+        corpus.watch(JOBS_DIR, JOBS_WATCH_INTERVAL)
+
+
+def require_ready():
+    if not warmup.ready:
+        raise HTTPException(status_code=503, detail=warmup.status(), headers={"Retry-After": "5"})
+
+
+# ---- Metrics ----
+metrics = Registry()
+STAGE_LATENCY = metrics.register(Histogram(
+    "career_api_stage_duration_seconds", "Time spent in each recommendation stage", ("endpoint", "stage")))
+REQUESTS = metrics.register(Counter(
+    "career_api_requests_total", "HTTP requests by route, method and status", ("path", "method", "status")))
+REQUEST_LATENCY = metrics.register(Histogram(
+    "career_api_request_duration_seconds", "End-to-end request latency", ("path",)))
+metrics.register(Gauge(
+    "career_api_job_corpus_size", "Jobs in the current job index", lambda: len(corpus.index) if corpus is not None else 0))
+metrics.register(Gauge(
+    "career_api_career_model_updates_total", "Online centroid updates folded into the career model",
+    lambda: career_model.model.updates if career_model is not None else 0, kind="counter"))
+metrics.register(Gauge(
+    "career_api_job_duplicates_collapsed_total", "Near-duplicate postings dropped at ingest",
+    lambda: corpus.duplicates if corpus is not None else 0, kind="counter"))
+metrics.register(Gauge(
+    "career_api_vocabulary_size", "Words in the embedding store", lambda: len(glove) if glove is not None else 0))
+metrics.register(Gauge(
+    "career_api_resident_memory_bytes", "Resident set size of this process", lambda: process_memory()["rss"]))
+metrics.register(Gauge(
+    "career_api_response_cache_lookups_total", "Response cache lookups by result",
+    lambda: {("hit",): response_cache.hits, ("miss",): response_cache.misses}, ("result",), kind="counter"))
+
+
+def encode_json(result):
+    # Compact UTF-8, the same bytes as FastAPI's JSONResponse; orjson is several
+    # times faster than the json module on the large job dicts
+    if orjson is not None:
+        return orjson.dumps(result)
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(result, endpoint):
+    # Serialize explicitly so the cost shows up as its own stage
+    with STAGE_LATENCY.time(endpoint, "serialize"):
+        body = encode_json(result)
+    return body
 
-with open("app/linkedin_jobs__morocco_20250516_165349.json", "r", encoding="utf-8") as f:
-    job_data = json.load(f)
 
 # ---- Create FastAPI App ----
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    warmup.start(load_models)
+    yield
 
 
-@app.post("/recommend")
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    MetricsMiddleware, requests=REQUESTS, latency=REQUEST_LATENCY, routes=lambda: ROUTE_PATHS
+)
+# Bodies of at least RESPONSE_GZIP_MIN_SIZE bytes are gzipped for clients
+# sending `Accept-Encoding: gzip` (0 disables)
+RESPONSE_GZIP_MIN_SIZE = int(os.environ.get("RESPONSE_GZIP_MIN_SIZE", "1000"))
+if RESPONSE_GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=RESPONSE_GZIP_MIN_SIZE)
+
+
+@app.post("/recommend", dependencies=[Depends(require_ready)])
 def recommend(input: StudentInput):
+    index = corpus.index
+    model = career_model.model
+    filters = input.filters.as_key() if input.filters else None
+    fields = tuple(input.fields) if input.fields is not None else None
+    cache_key = (student_cache_key(input.skills, input.interests, glove), filters, fields, input.top_n,
+                 index.version, model.version)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
+
     # Generate student embedding
-    student_vec = get_student_vector(input.skills, input.interests, glove)
-    
+    with STAGE_LATENCY.time("/recommend", "embed"):
+        student_vec = get_student_vector(input.skills, input.interests, glove)
+
     # Predict career probabilities
-    prediction = predict_student(student_vec, centroids, careers)
-    
+    with STAGE_LATENCY.time("/recommend", "predict"):
+        prediction = predict_careers(student_vec, model)
+
+    # Recommend jobs using cosine similarity
+    with STAGE_LATENCY.time("/recommend", "jobs"):
+        jobs = recommend_jobs_filtered(student_vec, index, input.filters, input.top_n)
+
+    # The cache holds encoded bodies, so hits skip serialization too
+    body = json_response(build_recommendation(prediction, jobs, input.fields), "/recommend")
+    response_cache.put(cache_key, body)
+    return Response(body, media_type="application/json")
+
+
+@app.post("/recommend/batch", dependencies=[Depends(require_ready)])
+def recommend_batch(input: BatchInput):
+    # One student matrix for the whole cohort; careers and jobs are scored
+    # with matrix products instead of one /recommend call per student
+    with STAGE_LATENCY.time("/recommend/batch", "embed"):
+        student_matrix = get_student_matrix(
+            [(s.skills, s.interests) for s in input.students], glove
+        )
+    with STAGE_LATENCY.time("/recommend/batch", "predict"):
+        model = career_model.model
+        if 0 < CAREER_TOP_K < len(model.careers):
+            predictions = top_careers_batch(student_matrix, model, CAREER_TOP_K)
+        else:
+            predictions = predict_students(student_matrix, model.centroids, model.careers, temperature=model.temperature)
+
+    with STAGE_LATENCY.time("/recommend/batch", "jobs"):
+        index = corpus.index
+        top_n = max((s.top_n for s in input.students), default=5)
+        jobs = recommend_jobs_batch(student_matrix, index.jobs, index.matrix, top_n, searcher=index.searcher)
+        for i, student in enumerate(input.students):
+            if student.filters:
+                jobs[i] = recommend_jobs_filtered(student_matrix[i], index, student.filters, student.top_n)
+
+    results = [build_recommendation(p, j[:s.top_n], s.fields) for p, j, s in zip(predictions, jobs, input.students)]
+    return Response(json_response(results, "/recommend/batch"), media_type="application/json")
+
+
+def predict_careers(student_vec, model):
+    if 0 < CAREER_TOP_K < len(model.careers):
+        return top_careers(student_vec, model, CAREER_TOP_K)
+    return predict_student(student_vec, model.centroids, model.careers, temperature=model.temperature)
+
+
+def recommend_jobs_filtered(student_vec, index, filters, top_n=5):
+    # Filters resolve to a row subset through the inverted indexes, and only
+    # that subset is scored (exactly; it is small, so no ANN is needed)
+    rows = index.filters.rows(filters.location, filters.company, filters.skill) if filters else None
+    return recommend_jobs(student_vec, index.jobs, index.matrix, top_n, searcher=index.searcher, rows=rows)
+
+
+@app.post("/admin/jobs/reload", dependencies=[Depends(require_ready)])
+def reload_jobs():
+    # Embeds only unseen jobs; in-flight requests keep their old snapshot
+    return corpus.ingest_directory(JOBS_DIR)
+
+
+@app.post("/admin/careers/update", dependencies=[Depends(require_ready)])
+def update_careers(input: BatchInput):
+    # Fold newly observed students into the centroids; the new model is
+    # swapped in atomically and the response cache is cleared
+    student_matrix = get_student_matrix([(s.skills, s.interests) for s in input.students], glove)
+    return career_model.update(student_matrix)
+
+
+@app.post("/admin/careers/reload", dependencies=[Depends(require_ready)])
+def reload_careers():
+    # Pick up a checkpoint written by another worker or process
+    if not os.path.exists(CAREER_CHECKPOINT):
+        raise HTTPException(status_code=404, detail=f"{CAREER_CHECKPOINT} does not exist")
+    return {"reloaded": career_model.reload(), "version": career_model.model.version}
+
+
+@app.get("/health")
+def health():
+    # Liveness: the process is up and serving, whether or not models are loaded
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    # Readiness: 200 once every warm-up step is done, 503 with progress until then
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return response_cache.stats()
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def build_recommendation(prediction, jobs, fields=None):
     # Select top career based on max percentage
     top_career = max(prediction, key=prediction.get)
-    
-    # Recommend jobs using cosine similarity
-    jobs = recommend_jobs(student_vec, job_data, glove)
+
+    # Project job dicts to the requested fields (the full scraper record by
+    # default, which the Java backend's JobMatch reads)
+    if fields is not None:
+        jobs = [{field: job[field] for field in fields if field in job} for job in jobs]
 
     # Return both career and job list
     return {
@@ -59,3 +378,5 @@ def recommend(input: StudentInput):
         "job_matches": jobs
     }
 
+
+ROUTE_PATHS = frozenset(route.path for route in app.routes)
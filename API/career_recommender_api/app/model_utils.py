@@ -1,29 +1,30 @@
 import numpy as np
+from scipy.sparse import csr_matrix
 from sklearn.preprocessing import normalize
-from sklearn.metrics.pairwise import cosine_similarity
+from .embeddings import load_embedding_store, read_glove_text, store_exists, store_prefix_for
 
 # ---- Load GloVe Embeddings ----
 def load_glove_embeddings(glove_file_path='app/glove.6B.100d.txt', dim=100):
-    embeddings = {}
-    with open('app/glove.6B.100d.txt', 'r', encoding='utf-8') as f:
-        for line in f:
-            values = line.strip().split()
-            word = values[0]
-            vector = np.array(values[1:], dtype=np.float32)
-            if len(vector) == dim:
-                embeddings[word] = vector
-    return embeddings
+    # Prefer the memory-mapped binary store (see app/embeddings.py); parsing
+    # the text file is only a fallback for trees that were never converted.
+    prefix = store_prefix_for(glove_file_path)
+    if store_exists(prefix):
+        return load_embedding_store(prefix)
+    return read_glove_text(glove_file_path, dim)
 
 # ---- Student Vectorization ----
-def get_student_vector(skills, interests, embeddings, dim=100):
-    skill_weight = 2.0
-    interest_weight = 1.0
+SKILL_WEIGHT = 2.0
+INTEREST_WEIGHT = 1.0
+
+def tokenize_terms(terms):
+    return [w for term in terms for w in term.lower().split()]
 
-    processed_skills = [w for term in skills for w in term.lower().split()]
-    processed_interests = [w for term in interests for w in term.lower().split()]
+def get_student_vector(skills, interests, embeddings, dim=100):
+    processed_skills = tokenize_terms(skills)
+    processed_interests = tokenize_terms(interests)
 
-    skill_vectors = [embeddings[w] * skill_weight for w in processed_skills if w in embeddings]
-    interest_vectors = [embeddings[w] * interest_weight for w in processed_interests if w in embeddings]
+    skill_vectors = [embeddings[w] * SKILL_WEIGHT for w in processed_skills if w in embeddings]
+    interest_vectors = [embeddings[w] * INTEREST_WEIGHT for w in processed_interests if w in embeddings]
 
     if not skill_vectors and not interest_vectors:
         return np.zeros(dim)
@@ -32,31 +33,121 @@ def get_student_vector(skills, interests, embeddings, dim=100):
     mean_vector = np.mean(combined, axis=0)
     return normalize(mean_vector.reshape(1, -1))[0]
 
+def student_cache_key(skills, interests, embeddings):
+    # The token multisets get_student_vector actually embeds: case, term
+    # order/grouping and out-of-vocabulary words do not change the result
+    return (
+        tuple(sorted(w for w in tokenize_terms(skills) if w in embeddings)),
+        tuple(sorted(w for w in tokenize_terms(interests) if w in embeddings)),
+    )
+
+def get_student_matrix(students, embeddings, dim=100):
+    # Batched get_student_vector over (skills, interests) pairs: every known
+    # token becomes one weighted entry of a sparse students x vocabulary
+    # matrix, so the whole cohort is embedded with a single sparse product.
+    rows, cols, weights = [], [], []
+    for i, (skills, interests) in enumerate(students):
+        for terms, weight in ((skills, SKILL_WEIGHT), (interests, INTEREST_WEIGHT)):
+            for w in tokenize_terms(terms):
+                idx = embeddings.index.get(w)
+                if idx is not None:
+                    rows.append(i)
+                    cols.append(idx)
+                    weights.append(weight)
+
+    n = len(students)
+    if not rows:
+        return np.zeros((n, dim), dtype=np.float32)
+
+    # Only gather the vocabulary rows this batch actually uses
+    used, cols = np.unique(cols, return_inverse=True)
+    vectors = embeddings.rows(used)
+    weighted = csr_matrix((weights, (rows, cols)), shape=(n, len(used)), dtype=np.float32)
+    # The mean and the sum only differ by a positive factor, which L2
+    # normalization removes; students without known tokens stay zero.
+    return normalize(weighted @ vectors).astype(np.float32)
+
 # ---- Predict Career ----
-def predict_student(student_vec, centroids, careers, m=1.5):
-    distances = np.linalg.norm(student_vec - centroids, axis=1)
+def career_probabilities(distances, temperature=0.3, floor=0.05):
     distances = np.maximum(distances, 1e-10)
-
-    temperature = 0.3
     exp_scores = np.exp(-distances / temperature)
-    percentages = exp_scores / exp_scores.sum()
-    percentages = np.maximum(percentages, 0.05)
-    percentages /= percentages.sum()
+    percentages = exp_scores / exp_scores.sum(axis=-1, keepdims=True)
+    percentages = np.maximum(percentages, floor)
+    return percentages / percentages.sum(axis=-1, keepdims=True)
 
+def career_floor(k):
+    # Five careers at 5% spend at most a quarter of the mass on the floor;
+    # keep that share when only the top k of a large taxonomy are returned
+    return min(0.05, 0.25 / max(k, 1))
+
+def predict_student(student_vec, centroids, careers, m=1.5, temperature=0.3):
+    distances = np.linalg.norm(student_vec - centroids, axis=1)
+    percentages = career_probabilities(distances, temperature)
     return {career: round(float(p) * 100, 2) for career, p in zip(careers, percentages)}
 
+def pairwise_distances(X, centroids):
+    # ||x - c|| for every row pair without an n x k x d intermediate
+    sq = (X ** 2).sum(axis=1)[:, None] + (centroids ** 2).sum(axis=1)[None, :] - 2.0 * (X @ centroids.T)
+    return np.sqrt(np.maximum(sq, 0.0))
+
+def predict_students(student_matrix, centroids, careers, temperature=0.3):
+    percentages = career_probabilities(pairwise_distances(student_matrix, centroids), temperature)
+    return [
+        {career: round(float(p) * 100, 2) for career, p in zip(careers, row)}
+        for row in percentages
+    ]
+
+# ---- Job Embedding Matrix ----
+def job_text(job):
+    return job['job_title'] + ' ' + str(job.get('skills', ''))     # + ' ' + job.get('description', '') +
+
+def embed_jobs(job_data, embeddings, dim=100):
+    # One L2-normalized row per job, computed once at load time
+    return get_student_matrix([([job_text(job)], []) for job in job_data], embeddings, dim)
+
+def service_vocabulary(career_keywords, job_data):
+    # Every token the service embeds on its own: career keywords and job texts
+    words = set(tokenize_terms([kw for keywords in career_keywords.values() for kw in keywords]))
+    words.update(tokenize_terms([job_text(job) for job in job_data]))
+    words.update(tokenize_terms([skill for job in job_data for skill in job.get('skills', [])]))
+    return words
+
+def top_k_indices(scores, k):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind='stable')]
+
 # ---- Recommend Jobs ----
-def recommend_jobs(student_vec, job_data, embeddings, top_n=5):
-    scored_jobs = []
-    for job in job_data:
-        job_text = job['job_title'] + ' ' + str(job.get('skills', ''))     # + ' ' + job.get('description', '') + 
-        job_vec = get_student_vector([job_text], [], embeddings)
-        score = cosine_similarity([student_vec], [job_vec])[0][0]
-        scored_jobs.append((score, job))
-    
-    # Sort jobs by similarity score
-    scored_jobs.sort(reverse=True, key=lambda x: x[0])
-    
-    # Return top N
-    return [job for _, job in scored_jobs[:top_n]]
+def recommend_jobs(student_vec, job_data, job_matrix, top_n=5, searcher=None, rows=None):
+    student_vec = np.asarray(student_vec, dtype=np.float32)
+    if rows is not None:
+        # Filtered search: score only the matching subset of the job matrix
+        scores = job_matrix[rows] @ student_vec
+        return [job_data[rows[i]] for i in top_k_indices(scores, top_n)]
+    if searcher is not None:
+        # Approximate backend over the same rows (see app/ann.py)
+        return [job_data[i] for i in searcher.search(student_vec, top_n)]
+    # Rows of job_matrix are unit length, so the dot product is the cosine similarity
+    scores = job_matrix @ student_vec
+    return [job_data[i] for i in top_k_indices(scores, top_n)]
+
+def recommend_jobs_batch(student_matrix, job_data, job_matrix, top_n=5, chunk_size=1024, searcher=None):
+    if searcher is not None and searcher.name != 'exact':
+        return [recommend_jobs(vec, job_data, job_matrix, top_n, searcher) for vec in student_matrix]
 
+    # Score every student against every job, one students x jobs product per chunk
+    results = []
+    k = min(top_n, len(job_data))
+    for start in range(0, len(student_matrix), chunk_size):
+        scores = student_matrix[start:start + chunk_size] @ job_matrix.T
+        if k == 0:
+            results.extend([] for _ in range(len(scores)))
+            continue
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        for row in np.take_along_axis(top, order, axis=1):
+            results.append([job_data[i] for i in row])
+    return results
@@ -0,0 +1,107 @@
+# shared.py (Matrices shared read-only across uvicorn workers)
+#
+# `uvicorn --workers N` spawns N processes that each import app.main. The
+# GloVe store is already memory-mapped; the job matrix is written once to a
+# content-addressed `.npy` and memory-mapped too, so every worker maps the
+# same page-cache pages instead of holding a private copy.
+
+import hashlib
+import os
+import numpy as np
+
+
+def matrix_digest(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def atomic_write(path, writer, mode="wb"):
+    """Write `path` by calling `writer(f)` on a temporary file renamed into place.
+
+    Readers (other workers) never see a partial file. Going through a file
+    handle also keeps the name as given: np.save/np.savez append a suffix to
+    a bare path.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, mode) as f:
+            writer(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def share_matrix(matrix, digest, directory, prefix="jobs"):
+    """Return a read-only memmap of `matrix` backed by `<directory>/<prefix>-<digest>.npy`.
+
+    Workers that derive the same digest reuse the file the first one wrote.
+    """
+    path = os.path.join(directory, f"{prefix}-{digest}.npy")
+    try:
+        return np.load(path, mmap_mode="r")
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(directory, exist_ok=True)
+    # Harmless if another worker wrote the same bytes meanwhile
+    atomic_write(path, lambda f: np.save(f, np.ascontiguousarray(matrix, dtype=np.float32)))
+    return np.load(path, mmap_mode="r")
+
+
+def release_matrix(matrix):
+    """Unlink the file behind a shared matrix once it has been superseded.
+
+    Processes that still map it keep a valid mapping; one that was about to
+    open it rewrites it in `share_matrix`.
+    """
+    path = getattr(matrix, "filename", None)
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# ---- Process Memory ----
+def process_memory(pid="self"):
+    """Resident memory of a process in bytes: rss, pss, shared and private.
+
+    Reads /proc/<pid>/smaps_rollup (Linux); PSS charges shared pages
+    proportionally, so summing it across workers gives their true footprint.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+              "Private_Clean": "private", "Private_Dirty": "private"}
+    usage = {"rss": 0, "pss": 0, "shared": 0, "private": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    usage[fields[name]] += int(rest.split()[0]) * 1024
+    except OSError:
+        # No smaps_rollup (non-Linux / old kernel): fall back to statm RSS
+        with open(f"/proc/{pid}/statm", "r") as f:
+            usage["rss"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return usage
+
+
+def mapped_file_memory(pid="self", suffix=".npy"):
+    """Resident bytes (rss, pss) of a process's mappings of files ending in `suffix`."""
+    usage = {"rss": 0, "pss": 0}
+    counting = False
+    with open(f"/proc/{pid}/smaps", "r") as f:
+        for line in f:
+            head = line.split(None, 1)[0]
+            if not head.endswith(":") or "-" in head:
+                # Mapping header: "start-end perms offset dev inode [path]"
+                parts = line.split(None, 5)
+                path = parts[5].strip() if len(parts) == 6 else ""
+                counting = path.removesuffix(" (deleted)").endswith(suffix)
+            elif counting and head in ("Rss:", "Pss:"):
+                usage[head[:-1].lower()] += int(line.split()[1]) * 1024
+    return usage
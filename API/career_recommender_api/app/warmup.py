@@ -0,0 +1,67 @@
+# warmup.py (Background model loading with readiness reporting)
+
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+
+class Warmup:
+    """Runs a loader on a daemon thread and reports its progress.
+
+    The loader marks its stages with `with warmup.step(name):`; `status()`
+    lists them (pending / loading / done / failed with timings) for the
+    readiness probe, and `ready` turns true once the loader returns.
+    """
+
+    def __init__(self, steps):
+        self.steps = {name: {"state": "pending", "seconds": None} for name in steps}
+        self.ready = False
+        self.error = None
+        self.started = None
+        self._thread = None
+
+    @contextmanager
+    def step(self, name):
+        entry = self.steps.setdefault(name, {"state": "pending", "seconds": None})
+        entry["state"] = "loading"
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            entry["state"] = "failed"
+            raise
+        finally:
+            entry["seconds"] = round(time.perf_counter() - start, 3)
+        entry["state"] = "done"
+
+    def start(self, loader):
+        def run():
+            try:
+                loader()
+                self.ready = True
+            except Exception as e:
+                # Stay unready: the probe reports the error and orchestrators
+                # restart the container instead of routing traffic to it
+                self.error = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+
+        if self._thread is None:
+            self.started = time.time()
+            self._thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def status(self):
+        done = sum(1 for entry in self.steps.values() if entry["state"] == "done")
+        return {
+            "ready": self.ready,
+            "progress": round(done / len(self.steps), 3) if self.steps else 1.0,
+            "elapsed_seconds": round(time.time() - self.started, 3) if self.started else 0.0,
+            "steps": {name: dict(entry) for name, entry in self.steps.items()},
+            "error": self.error,
+        }
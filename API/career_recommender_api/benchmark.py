@@ -0,0 +1,606 @@
+# benchmark.py (Offline benchmarks for the career recommender)
+#
+# Run from API/career_recommender_api, e.g.
+#   python benchmark.py --glove app/glove.6B.100d.txt jobs --repeat 20
+
+import argparse
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app import (
+    load_glove_embeddings,
+    get_student_vector,
+    get_student_matrix,
+    predict_student,
+    predict_students,
+    recommend_jobs,
+    recommend_jobs_batch,
+    embed_jobs,
+    build_searcher,
+    process_memory,
+    CareerModel,
+    top_careers,
+)
+from app.careers import career_search_rows, keyword_centroids
+from app.shared import mapped_file_memory
+from model import (
+    CAREER_KEYWORDS,
+    TEST_CASES,
+    initialize_centroids,
+    train_fuzzy_kmeans,
+    train_fuzzy_kmeans_minibatch,
+)
+import model
+
+JOBS_PATH = "app/linkedin_jobs__morocco_20250516_165349.json"
+
+QUERIES = [
+    (["Python", "SQL"], ["Data"]),
+    (["Deep Learning", "Python", "Neural Networks"], ["AI Research", "Computer Vision"]),
+    (["Kali Linux", "Encryption", "Network Security"], ["Ethical Hacking", "Forensics"]),
+    (["AWS", "Terraform", "Serverless"], ["Cloud Architecture", "DevOps"]),
+    (["JavaScript", "React", "APIs"], ["Web Applications", "Frontend"]),
+]
+
+
+def load_jobs(path=JOBS_PATH, repeat=1):
+    with open(path, "r", encoding="utf-8") as f:
+        job_data = json.load(f)
+    return job_data * repeat
+
+
+def timed(fn, runs):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = fn()
+    return (time.perf_counter() - start) / runs, result
+
+
+# ---- Job Scoring ----
+def recommend_jobs_loop(student_vec, job_data, embeddings, top_n=5):
+    # The pre-matrix implementation: embed and score every job per request
+    scored_jobs = []
+    for job in job_data:
+        job_text = job['job_title'] + ' ' + str(job.get('skills', ''))
+        job_vec = get_student_vector([job_text], [], embeddings)
+        score = cosine_similarity([student_vec], [job_vec])[0][0]
+        scored_jobs.append((score, job))
+    scored_jobs.sort(reverse=True, key=lambda x: x[0])
+    return [job for _, job in scored_jobs[:top_n]]
+
+
+def bench_jobs(args):
+    glove = load_glove_embeddings(args.glove)
+    job_data = load_jobs(args.jobs, args.repeat)
+
+    start = time.perf_counter()
+    job_matrix = embed_jobs(job_data, glove)
+    build_s = time.perf_counter() - start
+
+    report = {"jobs": len(job_data), "matrix_build_s": round(build_s, 4), "queries": []}
+    for skills, interests in QUERIES:
+        vec = get_student_vector(skills, interests, glove)
+        loop_s, loop_top = timed(lambda: recommend_jobs_loop(vec, job_data, glove), args.loop_runs)
+        mat_s, mat_top = timed(lambda: recommend_jobs(vec, job_data, job_matrix), args.runs)
+        report["queries"].append({
+            "skills": skills,
+            "interests": interests,
+            "loop_ms": round(loop_s * 1e3, 3),
+            "matrix_ms": round(mat_s * 1e3, 3),
+            "speedup": round(loop_s / mat_s, 1),
+            # Ties may be ordered differently, so compare the titles as a multiset
+            "same_top_titles": sorted(j["job_title"] for j in loop_top) == sorted(j["job_title"] for j in mat_top),
+        })
+    return report
+
+
+# ---- Batch Scoring ----
+def bench_batch(args):
+    glove = load_glove_embeddings(args.glove)
+    job_data = load_jobs(args.jobs)
+    job_matrix = embed_jobs(job_data, glove)
+    rng = np.random.default_rng(0)
+    centroids = rng.normal(size=(5, glove.dim))
+    careers = [f"career_{i}" for i in range(len(centroids))]
+    students = [QUERIES[i % len(QUERIES)] for i in range(args.students)]
+
+    def sequential():
+        out = []
+        for skills, interests in students:
+            vec = get_student_vector(skills, interests, glove)
+            out.append((predict_student(vec, centroids, careers), recommend_jobs(vec, job_data, job_matrix)))
+        return out
+
+    def batched():
+        matrix = get_student_matrix(students, glove)
+        return list(zip(predict_students(matrix, centroids, careers), recommend_jobs_batch(matrix, job_data, job_matrix)))
+
+    seq_s, _ = timed(sequential, 1)
+    batch_s, _ = timed(batched, 1)
+    return {
+        "students": len(students),
+        "jobs": len(job_data),
+        "sequential_ms_per_student": round(seq_s * 1e3 / len(students), 4),
+        "batch_ms_per_student": round(batch_s * 1e3 / len(students), 4),
+        "speedup": round(seq_s / batch_s, 1),
+    }
+
+
+# ---- Approximate Job Search ----
+def synthetic_job_matrix(base, n, noise=0.3, seed=0):
+    # Jittered copies of real job rows, re-normalized: a corpus of any size
+    # with the same clustered geometry as the scraped jobs
+    rng = np.random.default_rng(seed)
+    rows = base[rng.integers(0, len(base), n)] + rng.normal(0, noise / np.sqrt(base.shape[1]), (n, base.shape[1]))
+    rows /= np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+    return rows.astype(np.float32)
+
+
+def bench_ann(args):
+    glove = load_glove_embeddings(args.glove)
+    base = embed_jobs(load_jobs(args.jobs), glove)
+    base = base[np.linalg.norm(base, axis=1) > 0]
+    matrix = synthetic_job_matrix(base, args.size)
+    queries = synthetic_job_matrix(base, args.queries, seed=1)
+
+    exact = build_searcher("exact", matrix)
+    truth = [set(exact.search(q, args.k)) for q in queries]
+    report = {"jobs": len(matrix), "queries": len(queries), "k": args.k, "runs": []}
+
+    def measure(backend, knob, value, searcher, build_s):
+        latencies, hits = [], 0
+        for q, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = searcher.search(q, args.k)
+            latencies.append(time.perf_counter() - start)
+            hits += len(expected.intersection(found))
+        report["runs"].append({
+            "backend": backend,
+            knob: value,
+            "build_s": round(build_s, 3),
+            f"recall@{args.k}": round(hits / (args.k * len(queries)), 4),
+            "p50_ms": round(np.percentile(latencies, 50) * 1e3, 3),
+            "p99_ms": round(np.percentile(latencies, 99) * 1e3, 3),
+        })
+
+    measure("exact", "params", None, exact, 0.0)
+    start = time.perf_counter()
+    ivf = build_searcher("ivf", matrix, nlist=args.nlist)
+    build_s = time.perf_counter() - start
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        measure("ivf", "nprobe", nprobe, ivf, build_s)
+
+    try:
+        start = time.perf_counter()
+        hnsw = build_searcher("hnsw", matrix)
+        build_s = time.perf_counter() - start
+    except ImportError as e:
+        report["hnsw"] = str(e)
+    else:
+        for ef in args.ef:
+            hnsw.index.set_ef(ef)
+            measure("hnsw", "ef", ef, hnsw, build_s)
+    return report
+
+
+# ---- Large Career Taxonomies ----
+def bench_careers(args):
+    glove = load_glove_embeddings(args.glove)
+    base = embed_jobs(load_jobs(args.jobs), glove)
+    base = base[np.linalg.norm(base, axis=1) > 0]
+    queries = synthetic_job_matrix(base, args.queries, seed=1).astype(np.float64)
+    report = {"k": args.k, "queries": len(queries), "runs": []}
+    for n in args.careers:
+        # Trained centroids are blends of unit vectors, so a little shorter than 1
+        centroids = synthetic_job_matrix(base, n).astype(np.float64) * 0.8
+        model = CareerModel(centroids, {f"career {i}": [] for i in range(n)})
+        run = {"careers": n}
+
+        full_s, full = timed(lambda: [predict_student(q, centroids, model.careers) for q in queries], 1)
+        run["all_careers_ms"] = round(full_s * 1e3 / len(queries), 4)
+        run["all_careers_max_pct"] = max(max(p.values()) for p in full)
+
+        exact = None
+        for backend in ("exact", "ivf", "hnsw"):
+            try:
+                start = time.perf_counter()
+                model.searcher = build_searcher(backend, career_search_rows(centroids))
+                build_s = time.perf_counter() - start
+            except ImportError:
+                continue
+            query_s, result = timed(lambda: [top_careers(q, model, args.k) for q in queries], 1)
+            exact = exact or result
+            run[backend] = {
+                "build_s": round(build_s, 4),
+                "ms": round(query_s * 1e3 / len(queries), 4),
+                f"recall@{args.k}": round(float(np.mean(
+                    [len(set(a) & set(e)) / len(e) for a, e in zip(result, exact)])), 4),
+            }
+        report["runs"].append(run)
+    return report
+
+
+# ---- Response Payloads ----
+def bench_payload(args):
+    # The /recommend body for each query: full scraper records (the default)
+    # vs a projection, encoded with json vs orjson, raw vs gzip
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+    glove = load_glove_embeddings(args.glove)
+    job_data = load_jobs(args.jobs)
+    job_matrix = embed_jobs(job_data, glove)
+    careers = {"AI/ML Engineer": 31.2, "Cybersecurity": 12.5, "Cloud Engineer": 18.1,
+               "Data Scientist": 24.9, "Software Developer": 13.3}
+
+    def body(jobs, fields):
+        if fields:
+            jobs = [{f: job[f] for f in fields if f in job} for job in jobs]
+        return {"career_recommendation": {"top": "AI/ML Engineer", "all": careers}, "job_matches": jobs}
+
+    encoders = {"json": lambda r: json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode("utf-8")}
+    if orjson is not None:
+        encoders["orjson"] = orjson.dumps
+    report = {"queries": len(QUERIES), "runs": []}
+    for label, fields, top_n in (("full top 5", None, 5), ("full top 20", None, 20),
+                                 ("projected top 5", args.fields, 5), ("projected top 20", args.fields, 20)):
+        results = [body(recommend_jobs(get_student_vector(s, i, glove), job_data, job_matrix, top_n), fields)
+                   for s, i in QUERIES]
+        raw = [encoders["json"](r) for r in results]
+        run = {
+            "response": label,
+            "bytes": int(np.mean([len(b) for b in raw])),
+            "gzip_bytes": int(np.mean([len(gzip.compress(b)) for b in raw])),
+        }
+        for name, encode in encoders.items():
+            encode_s, _ = timed(lambda: [encode(r) for r in results], args.runs)
+            run[f"{name}_us"] = round(encode_s * 1e6 / len(results), 2)
+        if orjson is not None:
+            run["identical_bytes"] = all(orjson.dumps(r) == b for r, b in zip(results, raw))
+        report["runs"].append(run)
+    return report
+
+
+# ---- Centroid Initialization ----
+def initialize_centroids_loop(X, k):
+    # The pre-vectorized implementation: O(n^2) Python loop for the densest
+    # point, then a per-pair norm for every point and centroid
+    centroids = []
+    distances = np.array([np.sum(np.linalg.norm(X - x, axis=1)) for x in X])
+    centroids.append(X[np.argmin(distances)])
+    for _ in range(1, k):
+        dists = np.array([np.min([np.linalg.norm(x - centroid)**2 for centroid in centroids]) for x in X])
+        centroids.append(X[np.argmax(dists)])
+    return np.array(centroids)
+
+
+def synthetic_students(n, k, dim=100, spread=0.5, seed=0, centres=None):
+    # Unit-length points around k centres (random unless given), like embedded
+    # student profiles
+    rng = np.random.default_rng(seed)
+    if centres is None:
+        centres = rng.normal(size=(k, dim))
+    centres = np.asarray(centres, dtype=np.float32)
+    k, dim = centres.shape
+    X = centres[rng.integers(0, k, n)] + rng.normal(0, spread, (n, dim)).astype(np.float32)
+    X /= np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+    return X
+
+
+def bench_init(args):
+    report = {"k": args.k, "dim": args.dim, "runs": []}
+    for n in args.sizes:
+        X = synthetic_students(n, args.k, args.dim)
+        run = {"points": n}
+        for method in ("density", "kmeans++"):
+            start = time.perf_counter()
+            initialize_centroids(X, args.k, method=method, seed=0)
+            run[f"{method}_s"] = round(time.perf_counter() - start, 4)
+        if n <= args.loop_max:
+            start = time.perf_counter()
+            reference = initialize_centroids_loop(X, args.k)
+            run["loop_s"] = round(time.perf_counter() - start, 4)
+            run["speedup"] = round(run["loop_s"] / run["density_s"], 1)
+            # Below the sample size the density mode is exact, so it must agree
+            if n <= 2048:
+                run["matches_loop"] = bool(np.allclose(initialize_centroids(X, args.k), reference, atol=1e-6))
+        report["runs"].append(run)
+    return report
+
+
+# ---- Career Model Training ----
+def traced(fn):
+    # Wall time and peak traced allocation (numpy reports to tracemalloc)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def career_ranking(centroids, glove):
+    careers = list(CAREER_KEYWORDS)
+    return [list(model.predict_student(model.get_student_vector(skills, interests, glove), centroids, careers))
+            for _, skills, interests in TEST_CASES]
+
+
+def bench_train(args):
+    glove = load_glove_embeddings(args.glove)
+    centres = keyword_centroids(CAREER_KEYWORDS, glove)
+    k = len(CAREER_KEYWORDS)
+    report = {"batch_size": args.batch_size, "runs": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f"students-{n}.npy")
+            np.save(path, synthetic_students(n, k, centres=centres, spread=args.spread))
+            run = {"students": n}
+
+            if n <= args.full_max:
+                full_s, full_peak, (full, _) = traced(lambda: train_fuzzy_kmeans(
+                    np.load(path), k, CAREER_KEYWORDS, glove, verbose=False))
+                run.update(full_s=round(full_s, 3), full_peak_mb=round(full_peak / 1e6, 1))
+
+            mini_s, mini_peak, (mini, _) = traced(lambda: train_fuzzy_kmeans_minibatch(
+                path, k, CAREER_KEYWORDS, glove, batch_size=args.batch_size, seed=0, verbose=False))
+            run.update(minibatch_s=round(mini_s, 3), minibatch_peak_mb=round(mini_peak / 1e6, 1))
+
+            if n <= args.full_max:
+                run["max_centroid_gap"] = round(float(np.abs(full - mini).max()), 6)
+                run["same_test_rankings"] = career_ranking(full, glove) == career_ranking(mini, glove)
+            report["runs"].append(run)
+    return report
+
+
+# ---- Training Scale ----
+def job_skill_vocabulary(job_data):
+    # Distinct skills listed by the scraped jobs, in first-seen order
+    return list(dict.fromkeys(skill for job in job_data for skill in job.get("skills", []) if skill))
+
+
+def synthetic_profiles(n, career_keywords, job_skills, seed=0, skills=(2, 5), interests=(1, 3), noise=0.3):
+    """n (skills, interests) pairs with the career each was drawn from.
+
+    A profile picks a career, then 2-5 skills from its keywords, each replaced
+    with probability `noise` by a random job skill, and 1-3 interests from the
+    same keywords, so the cohort clusters around the careers like real students.
+    """
+    rng = np.random.default_rng(seed)
+    # All careers' keywords in one array; career c owns vocab[start[c]:start[c] + size[c]]
+    keywords = list(career_keywords.values())
+    vocab = np.array([w for pool in keywords for w in pool], dtype=object)
+    size = np.array([len(pool) for pool in keywords])
+    start = np.concatenate([[0], np.cumsum(size)[:-1]])
+    careers = rng.integers(0, len(keywords), n)
+
+    def draw(low, high, replace):
+        counts = rng.integers(low, high + 1, n)
+        owner = np.repeat(careers, counts)
+        words = vocab[start[owner] + (rng.random(len(owner)) * size[owner]).astype(np.intp)]
+        if replace:
+            swap = rng.random(len(words)) < noise
+            words[swap] = np.array(job_skills, dtype=object)[rng.integers(0, len(job_skills), swap.sum())]
+        return [part.tolist() for part in np.split(words, np.cumsum(counts)[:-1])]
+
+    profiles = list(zip(draw(*skills, bool(job_skills)), draw(*interests, False)))
+    return profiles, careers
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _stage(seconds, peak):
+    return {"s": round(seconds, 4), "peak_mb": round(peak / 1e6, 1)}
+
+
+def bench_scale(args):
+    # Wall time and peak traced memory of every training/prediction stage on
+    # synthetic cohorts; `--out` reports from two commits can be diffed
+    glove = load_glove_embeddings(args.glove)
+    job_skills = job_skill_vocabulary(load_jobs(args.jobs))
+    careers = list(CAREER_KEYWORDS)
+    k = len(careers)
+    report = {"commit": _git_commit(), "numpy": np.__version__, "epochs": args.epochs,
+              "job_skills": len(job_skills), "noise": args.noise, "runs": []}
+    for n in args.sizes:
+        run = {"students": n}
+        gen_s, gen_peak, (profiles, labels) = traced(lambda: synthetic_profiles(
+            n, CAREER_KEYWORDS, job_skills, seed=args.seed, noise=args.noise))
+        run["generate"] = _stage(gen_s, gen_peak)
+
+        embed_s, embed_peak, X = traced(
+            lambda profiles=profiles: get_student_matrix(profiles, glove).astype(np.float64))
+        run["embed"] = _stage(embed_s, embed_peak)
+        # Not held through the training stages' memory peaks
+        del profiles
+
+        init_s, init_peak, _ = traced(lambda: initialize_centroids(X, k, seed=args.seed))
+        run["init"] = _stage(init_s, init_peak)
+
+        # tol=0 runs exactly --epochs epochs, so the per-epoch time is comparable across sizes
+        train_s, train_peak, (centroids, _) = traced(lambda: train_fuzzy_kmeans(
+            X, k, CAREER_KEYWORDS, glove, max_epochs=args.epochs, tol=0, verbose=False))
+        run["train"] = dict(_stage(train_s, train_peak), epoch_s=round(train_s / args.epochs, 4))
+
+        predict_s, predict_peak, predictions = traced(lambda: predict_students(X, centroids, careers))
+        run["predict"] = dict(_stage(predict_s, predict_peak), students_per_s=round(n / predict_s))
+
+        # Sanity check that the trained centroids recover the careers profiles were drawn from
+        top = np.array([careers.index(max(p, key=p.get)) for p in predictions])
+        run["top_career_accuracy"] = round(float(np.mean(top == labels)), 3)
+        run["rss_mb"] = round(process_memory()["rss"] / 1e6, 1)
+        report["runs"].append(run)
+    return report
+
+
+# ---- Multi-Worker Memory ----
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            return [int(c) for c in f.read().split()]
+    except OSError:
+        return []
+
+
+def _process_tree(pid):
+    pids = [pid]
+    for child in _children(pid):
+        pids.extend(_process_tree(child))
+    return pids
+
+
+def _wait_until_serving(port, proc, timeout):
+    # /ready answers 503 while the models load in the background
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {proc.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"uvicorn did not start within {timeout}s")
+
+
+def bench_workers(args):
+    # Launch the real server with N workers and sum the workers' memory.
+    # PSS splits shared pages between the processes mapping them, so if the
+    # GloVe store and job matrix are shared it grows far less than RSS.
+    env = dict(os.environ, GLOVE_PATH=args.glove)
+    report = {"runs": []}
+    for n in args.workers:
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--workers", str(n)]
+        proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_until_serving(args.port, proc, args.timeout)
+            time.sleep(args.settle)
+            pids = _process_tree(proc.pid)
+            workers = [p for p in pids if p != proc.pid] or [proc.pid]
+            usage = [process_memory(p) for p in workers]
+            mapped = [mapped_file_memory(p) for p in workers]
+            report["runs"].append({
+                "workers": n,
+                "rss_mb_total": round(sum(u["rss"] for u in usage) / 1e6, 1),
+                "pss_mb_total": round(sum(u["pss"] for u in usage) / 1e6, 1),
+                "private_mb_per_worker": round(sum(u["private"] for u in usage) / len(usage) / 1e6, 1),
+                "shared_mb_per_worker": round(sum(u["shared"] for u in usage) / len(usage) / 1e6, 1),
+                # GloVe store + job matrix mappings only
+                "npy_rss_mb_total": round(sum(m["rss"] for m in mapped) / 1e6, 2),
+                "npy_pss_mb_total": round(sum(m["pss"] for m in mapped) / 1e6, 2),
+            })
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    runs = report["runs"]
+    if len(runs) > 1:
+        first, last = runs[0], runs[-1]
+        report["pss_mb_per_added_worker"] = round(
+            (last["pss_mb_total"] - first["pss_mb_total"]) / (last["workers"] - first["workers"]), 1)
+        # Shared matrices: their total PSS stays flat however many workers map them
+        report["matrices_shared"] = last["npy_pss_mb_total"] <= first["npy_pss_mb_total"] * 1.1 + 1
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Career recommender benchmarks")
+    parser.add_argument("--glove", default="app/glove.6B.100d.txt")
+    parser.add_argument("--out", default=None, help="write the JSON report here as well")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("jobs", help="per-request job loop vs precomputed matrix + argpartition")
+    p.add_argument("--jobs", default=JOBS_PATH)
+    p.add_argument("--repeat", type=int, default=1, help="replicate the corpus to simulate larger dumps")
+    p.add_argument("--runs", type=int, default=200)
+    p.add_argument("--loop-runs", type=int, default=3)
+    p.set_defaults(func=bench_jobs)
+
+    p = sub.add_parser("batch", help="per-student scoring vs the batched /recommend/batch path")
+    p.add_argument("--jobs", default=JOBS_PATH)
+    p.add_argument("--students", type=int, default=5000)
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser("ann", help="recall@k and latency of the ANN backends vs exact search")
+    p.add_argument("--jobs", default=JOBS_PATH)
+    p.add_argument("--size", type=int, default=1_000_000, help="synthetic corpus size")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=5)
+    p.add_argument("--nlist", type=int, default=None)
+    p.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    p.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    p.set_defaults(func=bench_ann)
+
+    p = sub.add_parser("careers", help="top-k career lookup (exact/ivf/hnsw) vs scoring every career")
+    p.add_argument("--jobs", default=JOBS_PATH)
+    p.add_argument("--careers", type=int, nargs="+", default=[100, 1_000, 10_000, 50_000])
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=5)
+    p.set_defaults(func=bench_careers)
+
+    p = sub.add_parser("payload", help="/recommend body size and encode time: projection, orjson, gzip")
+    p.add_argument("--jobs", default=JOBS_PATH)
+    p.add_argument("--fields", nargs="+", default=["job_title", "company", "location"])
+    p.add_argument("--runs", type=int, default=200)
+    p.set_defaults(func=bench_payload)
+
+    p = sub.add_parser("init", help="centroid initialization time, 1k to 1M points")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    p.add_argument("--k", type=int, default=5)
+    p.add_argument("--dim", type=int, default=100)
+    p.add_argument("--loop-max", type=int, default=2_000, help="also time the original loop up to this size")
+    p.set_defaults(func=bench_init)
+
+    p = sub.add_parser("train", help="full-batch vs mini-batch fuzzy k-means: time, peak memory, agreement")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--batch-size", type=int, default=4096)
+    p.add_argument("--spread", type=float, default=0.5)
+    p.add_argument("--full-max", type=int, default=1_000_000, help="skip the full-batch trainer above this size")
+    p.set_defaults(func=bench_train)
+
+    p = sub.add_parser("scale", help="synthetic students: embed, init, train epochs and batch predict by size")
+    p.add_argument("--jobs", default=JOBS_PATH, help="job dump whose skill lists feed the generator")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    p.add_argument("--epochs", type=int, default=10)
+    p.add_argument("--noise", type=float, default=0.3, help="share of skills drawn from job skills")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_scale)
+
+    p = sub.add_parser("workers", help="memory of `uvicorn --workers N` for several N")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--timeout", type=float, default=300)
+    p.add_argument("--settle", type=float, default=2, help="seconds to wait after startup")
+    p.set_defaults(func=bench_workers)
+
+    args = parser.parse_args()
+    report = args.func(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    if report.get("matrices_shared") is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 import numpy as np
 import random
-import matplotlib.pyplot as plt
-from sklearn.manifold import TSNE
 from sklearn.preprocessing import normalize
-import requests
 import os
 from zipfile import ZipFile
 from io import BytesIO
 import pickle
 import json
+import argparse
+import tempfile
+import time
+import hashlib
+from datetime import datetime, timezone
+from app.careers import DEFAULT_PARAMS, fuzzy_memberships, keyword_centroids
+from app.model_utils import career_probabilities, pairwise_distances
 
 # ----------------------------
 # 1. Download and Load GloVe embeddings
@@ -18,6 +22,8 @@ def download_glove_embeddings():
     glove_file = 'glove.6B.100d.txt'
     
     if not os.path.exists(glove_file):
+        import requests
+
         print("Downloading GloVe embeddings...")
         response = requests.get(glove_url)
         with ZipFile(BytesIO(response.content)) as z:
@@ -78,47 +84,91 @@ def get_student_vector(skills, interests, embeddings, dim=100):
 # ----------------------------
 # 3. Improved KMeans++ initialization
 # ----------------------------
-def initialize_centroids(X, k):
-    centroids = []
-    # First centroid: point with highest density
-    distances = np.array([np.sum(np.linalg.norm(X - x, axis=1)) for x in X])
-    centroids.append(X[np.argmin(distances)])
-    
+def _sq_distances_to(X, c, chunk_size):
+    # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, one chunk of rows at a time
+    out = np.empty(len(X), dtype=np.float64)
+    c = np.asarray(c, dtype=np.float64)
+    for start in range(0, len(X), chunk_size):
+        chunk = np.asarray(X[start:start + chunk_size], dtype=np.float64)
+        out[start:start + len(chunk)] = np.einsum('ij,ij->i', chunk, chunk) - 2 * chunk @ c + c @ c
+    return np.maximum(out, 0)
+
+
+def _densest_point(X, sample, chunk_size, rng):
+    # The point with the smallest summed distance to all others (exact up to
+    # `sample` points; beyond that, the densest of `sample` candidates,
+    # measured against another `sample` points)
+    n = len(X)
+    if n <= sample:
+        candidates = reference = np.arange(n)
+    else:
+        candidates = np.sort(rng.choice(n, sample, replace=False))
+        reference = np.sort(rng.choice(n, sample, replace=False))
+    ref = np.asarray(X[reference], dtype=np.float64)
+    ref_sq = np.einsum('ij,ij->i', ref, ref)
+    totals = np.empty(len(candidates))
+    for start in range(0, len(candidates), chunk_size):
+        rows = np.asarray(X[candidates[start:start + chunk_size]], dtype=np.float64)
+        sq = np.einsum('ij,ij->i', rows, rows)[:, None] - 2 * rows @ ref.T + ref_sq
+        totals[start:start + len(rows)] = np.sqrt(np.maximum(sq, 0)).sum(axis=1)
+    return candidates[np.argmin(totals)]
+
+
+def initialize_centroids(X, k, method='density', seed=None, chunk_size=4096, sample=2048):
+    """Pick k initial centroids from the rows of X (an array or a read-only memmap).
+
+    method='density': the densest point first, then repeatedly the point
+    farthest from every centroid so far (deterministic up to `sample` points).
+    method='kmeans++': a random first point, then points drawn with
+    probability proportional to their squared distance to the nearest centroid.
+
+    Memory is O(n + chunk_size * sample): each new centroid only updates the
+    running nearest-centroid distance of every point.
+    """
+    if method not in ('density', 'kmeans++'):
+        raise ValueError(f"Unknown initialization method {method!r} (use 'density' or 'kmeans++')")
+    n = len(X)
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+
+    if method == 'density':
+        first = _densest_point(X, sample, chunk_size, rng)
+    else:
+        first = rng.integers(n)
+    chosen = [first]
+
+    nearest = _sq_distances_to(X, X[first], chunk_size)
     for _ in range(1, k):
-        dists = np.array([np.min([np.linalg.norm(x - centroid)**2 for centroid in centroids]) for x in X])
-        probs = dists / np.sum(dists)
-        new_centroid_idx = np.argmax(dists)  # Farthest point
-        centroids.append(X[new_centroid_idx])
-    return np.array(centroids)
+        if method == 'density':
+            idx = int(np.argmax(nearest))  # Farthest point
+        else:
+            total = nearest.sum()
+            # All points coincide with a centroid: any remaining choice is as good
+            idx = int(rng.choice(n, p=nearest / total)) if total > 0 else int(rng.integers(n))
+        chosen.append(idx)
+        np.minimum(nearest, _sq_distances_to(X, X[idx], chunk_size), out=nearest)
+    return np.array(X[np.array(chosen)], dtype=np.float64)
 
 # ----------------------------
 # 4. Optimized Fuzzy KMeans
 # ----------------------------
-def train_fuzzy_kmeans(X, k, career_keywords, embeddings, max_epochs=100, tol=1e-5, m=1.5):
+def train_fuzzy_kmeans(X, k, career_keywords, embeddings, max_epochs=100, tol=1e-5, m=1.5, verbose=True,
+                       blend=0.8, init=None):
     # Initialize with career keywords
-    initial_centroids = []
-    for keywords in career_keywords.values():
-        vec = get_student_vector(keywords, [], embeddings)
-        initial_centroids.append(vec)
-    initial_centroids = np.array(initial_centroids)
+    initial_centroids = keyword_centroids(career_keywords, embeddings)
     
-    # Start with career-guided centroids
-    centroids = initial_centroids.copy()
+    # Start with career-guided centroids (or `init`, one row per career)
+    centroids = initial_centroids.copy() if init is None else np.array(init, dtype=np.float64)
     best_centroids = centroids.copy()
     min_shift = float('inf')
     
     for epoch in range(max_epochs):
-        # Regularized distances
-        distances = np.linalg.norm(X[:, np.newaxis] - centroids, axis=2)
-        distances = np.maximum(distances, 1e-10)
-        
         # Fuzzy membership calculation
-        weights = distances ** (-2/(m-1))
-        memberships = weights / weights.sum(axis=1, keepdims=True)
+        memberships = fuzzy_memberships(X, centroids, m)
         
-        # Update centroids (80% data-driven, 20% career-guided)
-        new_centroids = 0.8 * (memberships.T @ X) / memberships.sum(axis=0)[:, np.newaxis]
-        new_centroids += 0.2 * initial_centroids
+        # Update centroids (80% data-driven, 20% career-guided by default)
+        new_centroids = blend * (memberships.T @ X) / memberships.sum(axis=0)[:, np.newaxis]
+        new_centroids += (1 - blend) * initial_centroids
         
         shift = np.linalg.norm(new_centroids - centroids)
         
@@ -126,7 +176,8 @@ def train_fuzzy_kmeans(X, k, career_keywords, embeddings, max_epochs=100, tol=1e
             min_shift = shift
             best_centroids = new_centroids.copy()
         
-        print(f"Epoch {epoch+1:3d} | Shift: {shift:.6f} | Best: {min_shift:.6f}")
+        if verbose:
+            print(f"Epoch {epoch+1:3d} | Shift: {shift:.6f} | Best: {min_shift:.6f}")
         
         if shift < tol:
             break
@@ -135,21 +186,83 @@ def train_fuzzy_kmeans(X, k, career_keywords, embeddings, max_epochs=100, tol=1e
     
     return best_centroids, career_keywords  # Now returns both components
 
+
+def iter_student_batches(source, batch_size=4096, rng=None):
+    """Yield float64 blocks of student vectors from `source`.
+
+    source: an array, a path to a `.npy` file (memory-mapped, so only the
+    current block is read into RAM), or a generator function yielding arrays
+    (called again for every epoch). Array blocks are visited in shuffled order
+    when `rng` is given.
+    """
+    if callable(source):
+        for block in source():
+            yield np.asarray(block, dtype=np.float64)
+        return
+    X = np.load(source, mmap_mode='r') if isinstance(source, (str, os.PathLike)) else source
+    starts = np.arange(0, len(X), batch_size)
+    if rng is not None:
+        rng.shuffle(starts)
+    for start in starts:
+        yield np.asarray(X[start:start + batch_size], dtype=np.float64)
+
+
+def train_fuzzy_kmeans_minibatch(source, k, career_keywords, embeddings, batch_size=4096,
+                                 max_epochs=100, tol=1e-5, m=1.5, seed=None, max_no_improvement=10,
+                                 verbose=True, blend=0.8, init=None):
+    """Mini-batch fuzzy c-means over student vectors streamed by `iter_student_batches`.
+
+    Each batch moves the data-driven centroids towards its membership-weighted
+    mean with step size (batch weight / weight seen this epoch), so after an
+    epoch they are a running average over all students. Memberships use the
+    same `blend` with the career-keyword centroids as `train_fuzzy_kmeans`.
+    Batch order adds noise to the epoch shift, so training also stops once the
+    best shift has not improved for `max_no_improvement` epochs. Peak memory is O(batch_size * (d + k)), whatever the number of students.
+    """
+    rng = np.random.default_rng(seed)
+    initial_centroids = keyword_centroids(career_keywords, embeddings)
+    data_centroids = initial_centroids.copy() if init is None else np.array(init, dtype=np.float64)
+    centroids = data_centroids.copy()
+    best_centroids = centroids.copy()
+    min_shift = float('inf')
+    stale = 0
+
+    for epoch in range(max_epochs):
+        previous = centroids.copy()
+        seen = np.zeros(len(initial_centroids))
+        for batch in iter_student_batches(source, batch_size, rng):
+            memberships = fuzzy_memberships(batch, centroids, m)
+            weight = memberships.sum(axis=0)
+            seen += weight
+            step = (weight / np.maximum(seen, 1e-12))[:, np.newaxis]
+            batch_mean = (memberships.T @ batch) / np.maximum(weight, 1e-12)[:, np.newaxis]
+            data_centroids += step * (batch_mean - data_centroids)
+            # Update centroids (80% data-driven, 20% career-guided by default)
+            centroids = blend * data_centroids + (1 - blend) * initial_centroids
+
+        shift = np.linalg.norm(centroids - previous)
+
+        if shift < min_shift:
+            min_shift = shift
+            best_centroids = centroids.copy()
+            stale = 0
+        else:
+            stale += 1
+
+        if verbose:
+            print(f"Epoch {epoch+1:3d} | Shift: {shift:.6f} | Best: {min_shift:.6f}")
+
+        if shift < tol or stale >= max_no_improvement:
+            break
+
+    return best_centroids, career_keywords
+
 # ----------------------------
 # 5. Enhanced Prediction
 # ----------------------------
-def predict_student(student_vec, centroids, careers, m=1.5):
+def predict_student(student_vec, centroids, careers, m=1.5, temperature=0.3):
     distances = np.linalg.norm(student_vec - centroids, axis=1)
-    distances = np.maximum(distances, 1e-10)
-    
-    # Sharp temperature scaling
-    temperature = 0.3
-    exp_scores = np.exp(-distances / temperature)
-    percentages = exp_scores / exp_scores.sum()
-    
-    # Apply minimum threshold (5%) and renormalize
-    percentages = np.maximum(percentages, 0.05)
-    percentages = percentages / percentages.sum()
+    percentages = career_probabilities(distances, temperature)
     
     results = {career: round(float(percent)*100, 2) 
               for career, percent in zip(careers, percentages)}
@@ -159,6 +272,11 @@ def predict_student(student_vec, centroids, careers, m=1.5):
 # 6. Visualization
 # ----------------------------
 def visualize_clusters(X, centroids, careers):
+    # Plotting dependencies are only needed here, so importing this module
+    # (e.g. from the API build tools) stays lightweight
+    import matplotlib.pyplot as plt
+    from sklearn.manifold import TSNE
+
     combined = np.vstack([X, centroids])
     perplexity = min(30, len(combined)-1)
     
@@ -197,18 +315,91 @@ def visualize_clusters(X, centroids, careers):
 # ----------------------------
 # 7. Model Saving/Loading
 # ----------------------------
-def save_model(centroids, career_keywords, glove_embeddings_path, model_path='career_model.pkl'):
+MODEL_FORMAT_VERSION = 1
+
+def save_model(centroids, career_keywords, glove_embeddings_path, model_path='career_model.pkl', params=None):
     model_data = {
         'centroids': centroids,
         'career_keywords': career_keywords,
-        'glove_embeddings_path': glove_embeddings_path
+        'glove_embeddings_path': glove_embeddings_path,
+        # Hyperparameters the model was trained with (m, blend, temperature)
+        'params': params or DEFAULT_PARAMS
     }
     
     with open(model_path, 'wb') as f:
         pickle.dump(model_data, f)
     print(f"Model saved to {model_path}")
 
-def load_model(model_path='career_model.pkl'):
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def artifact_vocabulary(career_keywords, embeddings, max_rank=50000, extra_words=()):
+    """Career keyword words, `extra_words`, and the `max_rank` most frequent
+    words (GloVe files are ordered by frequency), in that order."""
+    words = dict.fromkeys(word for keywords in career_keywords.values() for term in keywords
+                          for word in term.lower().split())
+    words.update(dict.fromkeys(word for term in extra_words for word in term.lower().split()))
+    for rank, word in enumerate(embeddings):
+        if rank >= max_rank:
+            break
+        words[word] = None
+    return [word for word in words if word in embeddings]
+
+
+def save_model_artifact(centroids, career_keywords, embeddings, artifact_path='career_model', params=None,
+                        max_rank=50000, extra_words=()):
+    """Write a self-contained model: `<artifact_path>.npz` (centroids, vocabulary
+    words and their vectors) and a `<artifact_path>.json` manifest with the format
+    version, careers, keywords, hyperparameters and the npz checksum."""
+    words = artifact_vocabulary(career_keywords, embeddings, max_rank, extra_words)
+    npz_path, manifest_path = artifact_path + '.npz', artifact_path + '.json'
+    # Through a file handle so np.savez keeps the name as given
+    with open(npz_path, 'wb') as f:
+        np.savez(f, centroids=np.asarray(centroids, dtype=np.float64),
+                 words=np.array(words), vectors=np.array([embeddings[w] for w in words], dtype=np.float32))
+    manifest = {
+        'format_version': MODEL_FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'careers': list(career_keywords),
+        'career_keywords': career_keywords,
+        'params': params or DEFAULT_PARAMS,
+        'dim': int(np.shape(centroids)[1]),
+        'vocabulary_size': len(words),
+        'arrays': os.path.basename(npz_path),
+        'sha256': _file_sha256(npz_path),
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Model artifact saved to {manifest_path} ({len(words)} words)")
+    return manifest_path
+
+
+def _load_artifact(manifest_path):
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version', 0) > MODEL_FORMAT_VERSION:
+        raise ValueError(f"{manifest_path} has model format {manifest['format_version']}; "
+                         f"this code reads up to {MODEL_FORMAT_VERSION}")
+    npz_path = os.path.join(os.path.dirname(manifest_path), manifest['arrays'])
+    if _file_sha256(npz_path) != manifest['sha256']:
+        raise ValueError(f"{npz_path} does not match the checksum in {manifest_path}")
+    with np.load(npz_path) as data:
+        centroids, words, vectors = data['centroids'], data['words'].tolist(), data['vectors']
+    return {
+        'centroids': centroids,
+        'career_keywords': manifest['career_keywords'],
+        'params': manifest['params'],
+        'embeddings': dict(zip(words, vectors)),
+        'manifest': manifest,
+    }
+
+
+def _load_pickle(model_path):
     with open(model_path, 'rb') as f:
         model_data = pickle.load(f)
     
@@ -218,66 +409,258 @@ def load_model(model_path='career_model.pkl'):
     return {
         'centroids': model_data['centroids'],
         'career_keywords': model_data['career_keywords'],
+        'params': model_data.get('params', DEFAULT_PARAMS),
         'embeddings': glove_embeddings
     }
 
-def predict_with_saved_model(student_skills, student_interests, model_path='career_model.pkl'):
-    # Load model
+
+# Loaded models by (path, mtime): repeated predictions never touch the disk
+_MODEL_CACHE = {}
+
+def load_model(model_path='career_model.json'):
+    """Load a model artifact manifest (.json) or a legacy pickle (.pkl).
+
+    Models are cached for the life of the process; rewriting the file (a
+    new mtime) loads the new version on the next call.
+    """
+    key = (os.path.abspath(model_path), os.path.getmtime(model_path))
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        loader = _load_pickle if model_path.endswith('.pkl') else _load_artifact
+        model = loader(model_path)
+        # Drop superseded versions of the same file
+        for stale in [k for k in _MODEL_CACHE if k[0] == key[0]]:
+            del _MODEL_CACHE[stale]
+        _MODEL_CACHE[key] = model
+    return model
+
+def predict_with_saved_model(student_skills, student_interests, model_path='career_model.json'):
+    # Load model (cached after the first call)
     model = load_model(model_path)
     
     # Get student vector
     student_vec = get_student_vector(student_skills, student_interests, model['embeddings'])
     
     # Predict
-    predictions = predict_student(student_vec, model['centroids'], list(model['career_keywords'].keys()))
+    predictions = predict_student(student_vec, model['centroids'], list(model['career_keywords'].keys()),
+                                  temperature=model['params']['temperature'])
     
     return predictions
 
 # ----------------------------
-# 8. Main Execution
+# 8. Hyperparameter Sweep
+# ----------------------------
+SWEEP_TEMPERATURES = (0.1, 0.2, 0.3, 0.5, 0.75, 1.0)
+
+def keyword_embeddings(career_keywords, embeddings):
+    # Only the vectors training needs, small enough to hand to worker processes
+    words = {word for keywords in career_keywords.values() for term in keywords for word in term.lower().split()}
+    return {word: embeddings[word] for word in words if word in embeddings}
+
+
+def fuzzy_objective(X, centroids, m=1.5):
+    # Mean over students of sum_j u_ij^m * ||x_i - c_j||^2 (lower is tighter)
+    memberships = fuzzy_memberships(X, centroids, m)
+    return float(((memberships ** m) * pairwise_distances(X, centroids) ** 2).sum(axis=1).mean())
+
+
+def silhouette(X, centroids):
+    from sklearn.metrics import silhouette_score
+
+    labels = np.argmin(pairwise_distances(X, centroids), axis=1)
+    if not 2 <= len(np.unique(labels)) <= len(X) - 1:
+        return -1.0  # Undefined with a single (or one-point-per-) cluster
+    return float(silhouette_score(X, labels))
+
+
+def calibrate_temperature(X, centroids, m=1.5, temperatures=SWEEP_TEMPERATURES):
+    """The prediction temperature whose percentages best match the fuzzy
+    memberships (lowest mean KL(memberships || percentages)), and every KL."""
+    memberships = np.maximum(fuzzy_memberships(X, centroids, m), 1e-12)
+    distances = pairwise_distances(X, centroids)
+    kl = {}
+    for t in temperatures:
+        percentages = career_probabilities(distances, t)
+        kl[t] = float((memberships * np.log(memberships / percentages)).sum(axis=1).mean())
+    return min(kl, key=kl.get), kl
+
+
+def restart_centroids(X, initial_centroids, seed):
+    # k-means++ seeds, each assigned to the career centroid it is closest to,
+    # so centroid j still means career j
+    from scipy.optimize import linear_sum_assignment
+
+    seeds = initialize_centroids(X, len(initial_centroids), method='kmeans++', seed=seed)
+    cost = np.linalg.norm(initial_centroids[:, np.newaxis] - seeds, axis=2)
+    _, order = linear_sum_assignment(cost)
+    return seeds[order]
+
+
+_SWEEP = {}
+
+def _sweep_init(students_path, career_keywords, embeddings, sample, minibatch):
+    # Each worker memory-maps the same student matrix instead of receiving a pickled copy
+    X = np.load(students_path, mmap_mode='r')
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(len(X), min(sample, len(X)), replace=False))
+    _SWEEP.update(X=X, path=students_path, sample=np.asarray(X[rows], dtype=np.float64),
+                  career_keywords=career_keywords, embeddings=embeddings, minibatch=minibatch)
+
+
+def _sweep_run(run):
+    X, sample = _SWEEP['X'], _SWEEP['sample']
+    career_keywords, embeddings = _SWEEP['career_keywords'], _SWEEP['embeddings']
+    init = None
+    if run['restart']:
+        init = restart_centroids(sample, keyword_centroids(career_keywords, embeddings), seed=run['restart'])
+
+    start = time.perf_counter()
+    if _SWEEP['minibatch']:
+        centroids, _ = train_fuzzy_kmeans_minibatch(_SWEEP['path'], len(career_keywords), career_keywords, embeddings,
+                                                    m=run['m'], blend=run['blend'], init=init,
+                                                    seed=run['restart'], verbose=False)
+    else:
+        centroids, _ = train_fuzzy_kmeans(X, len(career_keywords), career_keywords, embeddings,
+                                          m=run['m'], blend=run['blend'], init=init, verbose=False)
+    temperature, kl = calibrate_temperature(sample, centroids, run['m'])
+    return dict(run,
+                train_s=round(time.perf_counter() - start, 3),
+                silhouette=round(silhouette(sample, centroids), 6),
+                objective=round(fuzzy_objective(sample, centroids, run['m']), 6),
+                temperature=temperature,
+                kl=round(kl[temperature], 6),
+                centroids=centroids)
+
+
+def sweep(students_path, career_keywords, embeddings, ms=(1.5,), blends=(0.8,), restarts=1,
+          workers=None, metric='silhouette', sample=5000, minibatch=False):
+    """Train one model per (m, blend, restart) across a process pool and rank them.
+
+    Restart 0 starts from the career-keyword centroids, later restarts from
+    k-means++ seeds. Runs are scored on up to `sample` students by silhouette
+    (higher is better) or fuzzy objective (lower is better), and each gets the
+    prediction temperature calibrated by `calibrate_temperature`.
+    Returns (best run, all runs sorted best first).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    grid = [{'m': m, 'blend': blend, 'restart': r} for m in ms for blend in blends for r in range(restarts)]
+    initargs = (students_path, career_keywords, keyword_embeddings(career_keywords, embeddings), sample, minibatch)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_sweep_init, initargs=initargs) as pool:
+        runs = list(pool.map(_sweep_run, grid))
+    runs.sort(key=lambda r: -r['silhouette'] if metric == 'silhouette' else r['objective'])
+    return runs[0], runs
+
+
+def run_sweep(args):
+    glove_embeddings = load_glove_embeddings(args.glove)
+    with tempfile.TemporaryDirectory() as tmp:
+        students_path = args.students
+        if students_path is None:
+            students_path = os.path.join(tmp, 'students.npy')
+            np.save(students_path, np.array([get_student_vector(s["skills"], s["interests"], glove_embeddings)
+                                             for s in STUDENTS]))
+        start = time.perf_counter()
+        best, runs = sweep(students_path, CAREER_KEYWORDS, glove_embeddings, ms=args.m, blends=args.blend,
+                           restarts=args.restarts, workers=args.workers, metric=args.metric,
+                           minibatch=args.minibatch)
+        elapsed = time.perf_counter() - start
+
+    params = {'m': best['m'], 'blend': best['blend'], 'temperature': best['temperature']}
+    save_model(best['centroids'], CAREER_KEYWORDS, args.glove, args.out, params=params)
+    save_model_artifact(best['centroids'], CAREER_KEYWORDS, glove_embeddings, os.path.splitext(args.out)[0], params)
+    report = {
+        'metric': args.metric,
+        'runs': len(runs),
+        'workers': args.workers or os.cpu_count(),
+        'elapsed_s': round(elapsed, 3),
+        'best': {key: value for key, value in best.items() if key != 'centroids'},
+        'all': [{key: value for key, value in run.items() if key != 'centroids'} for run in runs],
+    }
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Best of {len(runs)} runs: {params} ({args.metric}); report written to {args.report}")
+
+# ----------------------------
+# 9. Training Data
+# ----------------------------
+# Enhanced student data
+STUDENTS = [
+    {"name": "AI Student", "skills": ["Python", "TensorFlow", "Deep Learning"], 
+     "interests": ["Neural Networks", "Machine Learning"]},
+    {"name": "Cyber Student", "skills": ["Linux", "Wireshark", "Encryption"], 
+     "interests": ["Security", "Penetration Testing"]},
+    {"name": "Cloud Student", "skills": ["AWS", "Docker", "Kubernetes"], 
+     "interests": ["DevOps", "Scalability"]},
+    {"name": "Data Student", "skills": ["Python", "Pandas", "Statistics"], 
+     "interests": ["Analysis", "Visualization"]},
+    {"name": "Dev Student", "skills": ["JavaScript", "React", "Node"], 
+     "interests": ["Web Development", "APIs"]},
+    {"name": "AI Student 2", "skills": ["PyTorch", "NLP", "Algorithms"], 
+     "interests": ["Computer Vision", "AI Research"]},
+    {"name": "Cyber Student 2", "skills": ["Firewall", "Kali", "Forensics"], 
+     "interests": ["Ethical Hacking", "Cyber Defense"]},
+    {"name": "Cloud Student 2", "skills": ["Azure", "Terraform", "CI/CD"], 
+     "interests": ["Infrastructure", "Cloud Security"]},
+    {"name": "Data Student 2", "skills": ["SQL", "R", "Machine Learning"], 
+     "interests": ["Data Mining", "Big Data"]},
+    {"name": "Dev Student 2", "skills": ["Java", "Spring", "Microservices"], 
+     "interests": ["Backend", "System Design"]}
+]
+
+# Career definitions with more specific keywords
+CAREER_KEYWORDS = {
+    "AI/ML Engineer": ["neural", "machine", "deep", "tensor", "pytorch", "algorithm", 
+                      "vision", "nlp", "convolutional", "transformer", "reinforcement"],
+    "Cybersecurity": ["security", "penetration", "firewall", "encryption", "hacking",
+                     "forensics", "kali", "malware", "vulnerability", "intrusion", "audit"],
+    "Cloud Engineer": ["cloud", "aws", "azure", "docker", "kubernetes", "devops",
+                      "infrastructure", "serverless", "terraform", "microservices", "scalability"],
+    "Data Scientist": ["data", "analysis", "statistics", "visualization", "pandas",
+                      "mining", "bigdata", "regression", "clustering", "hypothesis", "experiment"],
+    "Software Developer": ["code", "development", "programming", "application", "debugging",
+                         "web", "backend", "frontend", "api", "database", "framework"]
+}
+
+# Held-out profiles used to check predictions
+TEST_CASES = [
+    ("AI Focused", ["Deep Learning", "Python", "Neural Networks"], ["AI Research", "Computer Vision"]),
+    ("Cyber Focused", ["Kali Linux", "Encryption", "Network Security"], ["Ethical Hacking", "Forensics"]),
+    ("Cloud Focused", ["AWS", "Terraform", "Serverless"], ["Cloud Architecture", "DevOps"]),
+    ("Data Focused", ["Pandas", "SQL", "Data Mining"], ["Business Intelligence", "Analytics"]),
+    ("Dev Focused", ["JavaScript", "React", "APIs"], ["Web Applications", "Frontend"])
+]
+
+# ----------------------------
+# 10. Main Execution
 # ----------------------------
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the career model")
+    sub = parser.add_subparsers(dest='command')
+    p = sub.add_parser('sweep', help="parallel restarts and hyperparameter sweep; saves the best model")
+    p.add_argument('--glove', default='glove.6B.100d.txt')
+    p.add_argument('--students', default=None, help=".npy of student vectors (default: embed STUDENTS)")
+    p.add_argument('--m', type=float, nargs='+', default=[1.3, 1.5, 2.0])
+    p.add_argument('--blend', type=float, nargs='+', default=[0.6, 0.8, 1.0], help="data-driven share of each centroid")
+    p.add_argument('--restarts', type=int, default=4)
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--metric', choices=['silhouette', 'objective'], default='silhouette')
+    p.add_argument('--minibatch', action='store_true', help="train with train_fuzzy_kmeans_minibatch")
+    p.add_argument('--out', default='career_model.pkl')
+    p.add_argument('--report', default='sweep_report.json')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'sweep':
+        run_sweep(args)
+        return
+
     download_glove_embeddings()
     glove_file_path = 'glove.6B.100d.txt'
     glove_embeddings = load_glove_embeddings(glove_file_path)
-    
-    # Enhanced student data
-    students = [
-        {"name": "AI Student", "skills": ["Python", "TensorFlow", "Deep Learning"], 
-         "interests": ["Neural Networks", "Machine Learning"]},
-        {"name": "Cyber Student", "skills": ["Linux", "Wireshark", "Encryption"], 
-         "interests": ["Security", "Penetration Testing"]},
-        {"name": "Cloud Student", "skills": ["AWS", "Docker", "Kubernetes"], 
-         "interests": ["DevOps", "Scalability"]},
-        {"name": "Data Student", "skills": ["Python", "Pandas", "Statistics"], 
-         "interests": ["Analysis", "Visualization"]},
-        {"name": "Dev Student", "skills": ["JavaScript", "React", "Node"], 
-         "interests": ["Web Development", "APIs"]},
-        {"name": "AI Student 2", "skills": ["PyTorch", "NLP", "Algorithms"], 
-         "interests": ["Computer Vision", "AI Research"]},
-        {"name": "Cyber Student 2", "skills": ["Firewall", "Kali", "Forensics"], 
-         "interests": ["Ethical Hacking", "Cyber Defense"]},
-        {"name": "Cloud Student 2", "skills": ["Azure", "Terraform", "CI/CD"], 
-         "interests": ["Infrastructure", "Cloud Security"]},
-        {"name": "Data Student 2", "skills": ["SQL", "R", "Machine Learning"], 
-         "interests": ["Data Mining", "Big Data"]},
-        {"name": "Dev Student 2", "skills": ["Java", "Spring", "Microservices"], 
-         "interests": ["Backend", "System Design"]}
-    ]
-
-    # Career definitions with more specific keywords
-    career_keywords = {
-        "AI/ML Engineer": ["neural", "machine", "deep", "tensor", "pytorch", "algorithm", 
-                          "vision", "nlp", "convolutional", "transformer", "reinforcement"],
-        "Cybersecurity": ["security", "penetration", "firewall", "encryption", "hacking",
-                         "forensics", "kali", "malware", "vulnerability", "intrusion", "audit"],
-        "Cloud Engineer": ["cloud", "aws", "azure", "docker", "kubernetes", "devops",
-                          "infrastructure", "serverless", "terraform", "microservices", "scalability"],
-        "Data Scientist": ["data", "analysis", "statistics", "visualization", "pandas",
-                          "mining", "bigdata", "regression", "clustering", "hypothesis", "experiment"],
-        "Software Developer": ["code", "development", "programming", "application", "debugging",
-                             "web", "backend", "frontend", "api", "database", "framework"]
-    }
+    students = STUDENTS
+    career_keywords = CAREER_KEYWORDS
 
     # Prepare student vectors
     student_vectors = np.array([
@@ -294,17 +677,12 @@ def main():
         m=1.5
     )
     
+    # The pickle is what the API loads; the artifact is self-contained
     save_model(centroids, career_keywords, glove_file_path)
+    save_model_artifact(centroids, career_keywords, glove_embeddings)
 
     # Test predictions with original model
-    test_cases = [
-        ("AI Focused", ["Deep Learning", "Python", "Neural Networks"], ["AI Research", "Computer Vision"]),
-        ("Cyber Focused", ["Kali Linux", "Encryption", "Network Security"], ["Ethical Hacking", "Forensics"]),
-        ("Cloud Focused", ["AWS", "Terraform", "Serverless"], ["Cloud Architecture", "DevOps"]),
-        ("Data Focused", ["Pandas", "SQL", "Data Mining"], ["Business Intelligence", "Analytics"]),
-        ("Dev Focused", ["JavaScript", "React", "APIs"], ["Web Applications", "Frontend"])
-    ]
-
+    test_cases = TEST_CASES
     print("\n=== Career Recommendations (Original Model) ===")
     for name, skills, interests in test_cases:
         vec = get_student_vector(skills, interests, glove_embeddings)
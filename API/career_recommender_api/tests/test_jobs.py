@@ -0,0 +1,30 @@
+import numpy as np
+
+from app.dedup import NearDuplicateIndex
+from app.embeddings import EmbeddingStore
+from app.jobs import JobCorpus
+
+WORDS = ["data", "engineer", "python", "spark", "pipelines", "casablanca", "rabat", "acme"]
+
+
+def make_corpus():
+    vectors = np.random.default_rng(0).standard_normal((len(WORDS), 100)).astype(np.float32)
+    return JobCorpus(EmbeddingStore(WORDS, vectors), dedup=NearDuplicateIndex())
+
+
+def repost(company, location):
+    return {"job_title": "Data Engineer", "company": company, "location": location,
+            "description": "Build data pipelines in python and spark", "skills": ["python", "spark"]}
+
+
+def test_reingesting_a_batch_of_duplicates_does_not_recount_them():
+    corpus = make_corpus()
+    corpus.ingest([repost("Acme", "Casablanca")])
+    reposts = [repost("Acme Inc", "Casablanca"), repost("ACME", "Rabat")]
+
+    first = corpus.ingest(reposts)
+    assert first == {"added": 0, "skipped": 0, "duplicates": 2, "total": 1}
+
+    second = corpus.ingest(reposts)
+    assert second == {"added": 0, "skipped": 2, "duplicates": 0, "total": 1}
+    assert corpus.duplicates == 2
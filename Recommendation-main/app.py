@@ -1,18 +1,86 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
 import pandas as pd
-from recommendation_engine import load_data, hybrid_recommendations  
+from recommendation_engine import load_courses, load_interaction_store, hybrid_recommendations
+from factors import FactorTrainer
+from neighbours import NeighbourIndex
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 
 # Load data once at startup
-courses_df, ratings_df = load_data()
-print("Columns in ratings_df:", ratings_df.columns.tolist())
-print(ratings_df['UserID'].dtype)
+courses_df = load_courses()
+# Users x courses CSR matrix read by every recommender; POST /ratings updates
+# it. Saved to RATINGS_PATH every RATINGS_SAVE_INTERVAL seconds if ratings
+# changed, so they survive a restart and the saved factors and neighbour
+# indexes below are reused when built from the same ratings. The first start
+# saves a fresh synthetic ratings dataset there.
+RATINGS_PATH = os.environ.get("RATINGS_PATH", "ratings.pkl")
+store = load_interaction_store(RATINGS_PATH)
+store.autosave(RATINGS_PATH, interval=float(os.environ.get("RATINGS_SAVE_INTERVAL", "60")))
+course_titles = set(courses_df['Title'])
+
+# NMF factors are trained off the request path and saved to FACTORS_PATH:
+# again every FACTORS_RETRAIN_INTERVAL seconds if ratings changed, or once
+# FACTORS_RETRAIN_AFTER new ratings arrived. Users who rated since the last
+# run are folded in against the current factors.
+factors = FactorTrainer(
+    store,
+    path=os.environ.get("FACTORS_PATH", "nmf_factors.pkl"),
+    retrain_after=int(os.environ.get("FACTORS_RETRAIN_AFTER", "100")),
+    interval=float(os.environ.get("FACTORS_RETRAIN_INTERVAL", "3600")),
+)
+factors.load_or_train()
+factors.start()
+
+# Top-k similar courses per course for the item-based path, saved to
+# COURSE_NEIGHBOURS_PATH (`python neighbours.py` builds it offline). A
+# background thread refreshes the courses whose ratings changed every
+# NEIGHBOURS_REFRESH_INTERVAL seconds and saves the index at most every
+# NEIGHBOURS_SAVE_INTERVAL seconds.
+NEIGHBOURS_REFRESH_INTERVAL = float(os.environ.get("NEIGHBOURS_REFRESH_INTERVAL", "5"))
+NEIGHBOURS_SAVE_INTERVAL = float(os.environ.get("NEIGHBOURS_SAVE_INTERVAL", "600"))
+course_neighbours = NeighbourIndex(
+    store,
+    k=int(os.environ.get("COURSE_NEIGHBOURS_K", "10")),
+    path=os.environ.get("COURSE_NEIGHBOURS_PATH", "course_neighbours.pkl"),
+    workers=int(os.environ.get("COURSE_NEIGHBOURS_WORKERS", "1")),
+    refresh_interval=NEIGHBOURS_REFRESH_INTERVAL,
+    save_interval=NEIGHBOURS_SAVE_INTERVAL,
+)
+course_neighbours.load_or_build()
+course_neighbours.start()
+
+# The same for the top-k most similar users of each user (user-based path)
+user_neighbours = NeighbourIndex(
+    store,
+    k=int(os.environ.get("USER_NEIGHBOURS_K", "5")),
+    path=os.environ.get("USER_NEIGHBOURS_PATH", "user_neighbours.pkl"),
+    workers=int(os.environ.get("USER_NEIGHBOURS_WORKERS", "1")),
+    axis="users",
+    refresh_interval=NEIGHBOURS_REFRESH_INTERVAL,
+    save_interval=NEIGHBOURS_SAVE_INTERVAL,
+)
+user_neighbours.load_or_build()
+user_neighbours.start()
+
+# The hybrid endpoint runs the user, model and item recommenders concurrently.
+# Each must finish within HYBRID_DEADLINE seconds (HYBRID_DEADLINE_USER /
+# _MODEL / _ITEM override it per strategy); the response is built from those
+# that did, listed in the X-Recommenders header.
+strategy_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("HYBRID_WORKERS", "12")), thread_name_prefix="recommender"
+)
+HYBRID_DEADLINE = float(os.environ.get("HYBRID_DEADLINE", "2.0"))
+strategy_deadlines = {
+    name: float(os.environ.get(f"HYBRID_DEADLINE_{name.upper()}", HYBRID_DEADLINE))
+    for name in ("user", "model", "item")
+}
 
 app = FastAPI()
 
@@ -22,12 +90,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Recommenders"],
 )
 
 class UserRequest(BaseModel):
     user_id: int
     n_recommendations: int = 10
 
+class RatingRequest(BaseModel):
+    user_id: int
+    title: str
+    rating: float = Field(..., ge=1, le=5)
+
 class RecommendationResponse(BaseModel):
     title: str
     provider: str
@@ -36,14 +110,21 @@ class RecommendationResponse(BaseModel):
     course_link: str
 
 @app.post("/recommendations/hybrid", response_model=List[RecommendationResponse])
-def get_hybrid_recommendations(user_req: UserRequest):
-    if user_req.user_id not in ratings_df['UserID'].unique():
+def get_hybrid_recommendations(user_req: UserRequest, response: Response):
+    if not store.has_user(user_req.user_id):
         raise HTTPException(status_code=404, detail="User ID not found")
 
     try:
         result_df = hybrid_recommendations(
-            user_req.user_id, courses_df, ratings_df, user_req.n_recommendations
+            user_req.user_id, courses_df, store, user_req.n_recommendations, factors, course_neighbours,
+            user_neighbours, strategy_pool, strategy_deadlines
         )
+        if not result_df.attrs["recommenders"]:
+            # Every strategy failed or missed its deadline: an empty 200 would
+            # read as "nothing to recommend" rather than as an outage
+            raise HTTPException(status_code=503, detail="No recommender finished in time")
+        # The body stays a plain array, which is what the Java backend reads
+        response.headers["X-Recommenders"] = ",".join(result_df.attrs["recommenders"])
 
         # Option 1: Update keys before returning
         result_df = result_df.rename(columns={
@@ -55,11 +136,19 @@ def get_hybrid_recommendations(user_req: UserRequest):
         })
 
         return result_df.to_dict(orient="records")
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error generating recommendations: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/ratings")
+def add_rating(rating_req: RatingRequest):
+    if rating_req.title not in course_titles:
+        raise HTTPException(status_code=404, detail="Course not found")
+    store.rate(rating_req.user_id, rating_req.title, rating_req.rating)
+    return {"user_id": rating_req.user_id, "title": rating_req.title, "ratings": store.num_ratings}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,155 @@
+import logging
+import os
+import pickle
+import threading
+import time
+import numpy as np
+from scipy.optimize import nnls
+from sklearn.decomposition import NMF
+from interactions import atomic_write, ratings_fingerprint
+
+class FactorModel:
+    """NMF factors W (users x k) and H (k x courses) with their id maps."""
+
+    def __init__(self, W, H, users, titles, fingerprint=None, trained_at=None):
+        self.W = W
+        self.H = H
+        self.users = list(users)
+        self.titles = list(titles)
+        self.user_index = {u: i for i, u in enumerate(self.users)}
+        self.course_index = {t: i for i, t in enumerate(self.titles)}
+        self.fingerprint = fingerprint
+        self.trained_at = trained_at
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        return cls(data['W'], data['H'], data['users'], data['titles'], data['fingerprint'], data['trained_at'])
+
+    def save(self, path):
+        data = {
+            'W': self.W,
+            'H': self.H,
+            'users': self.users,
+            'titles': self.titles,
+            'fingerprint': self.fingerprint,
+            'trained_at': self.trained_at,
+        }
+        atomic_write(path, lambda f: pickle.dump(data, f))
+
+    def fold_in(self, course_cols, ratings):
+        """Latent vector for a ratings row, solved by NNLS against the fixed H.
+
+        Like NMF itself, unrated courses count as 0; courses the model has not
+        seen are ignored.
+        """
+        row = np.zeros(len(self.titles))
+        row[course_cols] = ratings
+        w, _ = nnls(self.H.T, row)
+        return w
+
+def train_factors(store, n_components=20, random_state=42):
+    """Fit NMF on a snapshot of the interaction store."""
+    matrix, users, titles = store.snapshot()
+    model = NMF(n_components=n_components, init='random', random_state=random_state)
+    W = model.fit_transform(matrix)
+    return FactorModel(W, model.components_, users, titles,
+                       ratings_fingerprint(matrix, users, titles), time.time())
+
+class FactorTrainer:
+    """Keeps a FactorModel trained on the interaction store, off the request path.
+
+    The model is retrained on a background thread every `interval` seconds
+    when ratings changed, or as soon as `retrain_after` new ratings arrived,
+    then saved to `path` and swapped in. Users who rated something since the
+    model's snapshot are folded in against its H until the next run.
+    """
+
+    def __init__(self, store, path=None, retrain_after=100, interval=3600.0, n_components=20):
+        self.store = store
+        self.path = path
+        self.retrain_after = retrain_after
+        self.interval = interval
+        self.n_components = n_components
+        self.model = None
+        self.stale_users = set()
+        # Stale users of the run in progress, until its model is swapped in
+        self._training_users = set()
+        self.new_ratings = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        store.listeners.append(self._on_rating)
+
+    def _on_rating(self, user_row, course_col):
+        with self._lock:
+            self.stale_users.add(self.store.users[user_row])
+            self.new_ratings += 1
+            if self.new_ratings >= self.retrain_after:
+                self._wake.set()
+
+    def load_or_train(self):
+        """Start from the model file when there is one, else train now."""
+        if self.path and os.path.exists(self.path):
+            model = FactorModel.load(self.path)
+            current = ratings_fingerprint(*self.store.snapshot())
+            if model.fingerprint != current:
+                # Trained on other ratings: fold everyone in and retrain soon
+                with self._lock:
+                    self.stale_users.update(self.store.users)
+                    self.new_ratings = max(self.new_ratings, self.retrain_after)
+                self._wake.set()
+            self.model = model
+        else:
+            self.train()
+        return self.model
+
+    def train(self):
+        with self._lock:
+            # Ratings arriving during training stay stale for the new model
+            self._training_users, self.stale_users = self.stale_users, set()
+            new_ratings, self.new_ratings = self.new_ratings, 0
+        try:
+            model = train_factors(self.store, self.n_components)
+            if self.path:
+                model.save(self.path)
+        except Exception:
+            with self._lock:
+                self.stale_users |= self._training_users
+                self._training_users = set()
+                self.new_ratings += new_ratings
+            raise
+        self.model = model
+        self._training_users = set()
+        return model
+
+    def start(self):
+        """Retrain on a daemon thread (see the class docstring)."""
+        def run():
+            while True:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                if not self.new_ratings:
+                    continue
+                try:
+                    self.train()
+                except Exception:
+                    logging.exception("NMF retraining failed")
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=run, name='nmf-trainer', daemon=True)
+            self._thread.start()
+
+    def user_vector(self, user_id):
+        """(model, latent vector) for `user_id`, folding in users newer than the model."""
+        model = self.model
+        row = model.user_index.get(user_id)
+        if row is not None and user_id not in self.stale_users and user_id not in self._training_users:
+            return model, model.W[row]
+        course_cols, ratings = self.store.user_ratings(user_id)
+        titles = self.store.titles
+        known = [(model.course_index[titles[c]], r) for c, r in zip(course_cols, ratings)
+                 if titles[c] in model.course_index]
+        cols = np.array([c for c, _ in known], dtype=np.intp)
+        return model, model.fold_in(cols, np.array([r for _, r in known], dtype=np.float64))
@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+import numpy as np
+from scipy.sparse import csr_matrix
+
+def ratings_fingerprint(matrix, users, titles):
+    """Hash of a ratings snapshot, to spot a model or index file built from other ratings."""
+    digest = hashlib.sha256()
+    for part in (matrix.indptr, matrix.indices, matrix.data):
+        digest.update(np.ascontiguousarray(part).tobytes())
+    digest.update(repr((users, titles)).encode('utf-8'))
+    return digest.hexdigest()
+
+def atomic_write(path, writer):
+    """Write `path` by calling `writer(f)` on a temporary file renamed into
+    place, so a reader never sees a partial file."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            writer(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+class InteractionStore:
+    """Users x courses ratings as a SciPy CSR matrix, shared by all recommenders.
+
+    Users and courses get integer ids in first-seen order (`user_index`,
+    `course_index`); only rated pairs are stored, so memory grows with the
+    number of ratings rather than users x courses. A rating for a pair that is
+    already stored is written into the matrix in place; new pairs are buffered
+    and merged the next time `matrix` is read. `save`/`load` keep the ratings
+    across restarts, so a saved factor model or neighbour index built from them
+    still matches.
+    """
+
+    def __init__(self):
+        self.user_index = {}
+        self.course_index = {}
+        self.users = []
+        self.titles = []
+        self.version = 0
+        # Called as listener(user_row, course_col) after every rating
+        self.listeners = []
+        self._matrix = csr_matrix((0, 0), dtype=np.float64)
+        self._pending = {}
+        self._lock = threading.RLock()
+        self._saver = None
+
+    @classmethod
+    def from_ratings(cls, ratings_df):
+        """Build the store from a UserID / Title / Rating DataFrame."""
+        store = cls()
+        # Repeated (user, course) pairs are averaged, as pivot_table did
+        ratings = ratings_df.groupby(['UserID', 'Title'], sort=False)['Rating'].mean().reset_index()
+        rows = np.array([store._user_row(u) for u in ratings['UserID']], dtype=np.int64)
+        cols = np.array([store._course_col(t) for t in ratings['Title']], dtype=np.int64)
+        store._matrix = csr_matrix(
+            (ratings['Rating'].to_numpy(dtype=np.float64), (rows, cols)),
+            shape=(len(store.users), len(store.titles))
+        )
+        store._matrix.sort_indices()
+        return store
+
+    @classmethod
+    def load(cls, path):
+        """A store saved by `save`."""
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        store = cls()
+        store.users, store.titles = list(data['users']), list(data['titles'])
+        store.user_index = {u: i for i, u in enumerate(store.users)}
+        store.course_index = {t: i for i, t in enumerate(store.titles)}
+        store._matrix = data['matrix']
+        return store
+
+    def save(self, path):
+        """Save a snapshot to `path`; returns the `version` it was taken at."""
+        with self._lock:
+            matrix, users, titles = self.snapshot()
+            version = self.version
+        atomic_write(path, lambda f: pickle.dump({'matrix': matrix, 'users': users, 'titles': titles}, f))
+        return version
+
+    def autosave(self, path, interval=60.0):
+        """Save to `path` every `interval` seconds when ratings changed, on a daemon thread."""
+        def run():
+            saved = self.version
+            while True:
+                time.sleep(interval)
+                if self.version == saved:
+                    continue
+                try:
+                    saved = self.save(path)
+                except Exception:
+                    logging.exception("Saving the ratings failed")
+
+        if self._saver is None:
+            self._saver = threading.Thread(target=run, name='ratings-saver', daemon=True)
+            self._saver.start()
+
+    def _user_row(self, user_id):
+        row = self.user_index.get(user_id)
+        if row is None:
+            row = self.user_index[user_id] = len(self.users)
+            self.users.append(user_id)
+        return row
+
+    def _course_col(self, title):
+        col = self.course_index.get(title)
+        if col is None:
+            col = self.course_index[title] = len(self.titles)
+            self.titles.append(title)
+        return col
+
+    @property
+    def matrix(self):
+        """The current users x courses CSR matrix (0 = not rated)."""
+        with self._lock:
+            shape = (len(self.users), len(self.titles))
+            if self._pending or self._matrix.shape != shape:
+                self._merge(shape)
+            return self._matrix
+
+    def _merge(self, shape):
+        current = self._matrix.tocoo()
+        keys = np.array(list(self._pending), dtype=np.int64).reshape(-1, 2)
+        rows = np.concatenate([current.row, keys[:, 0]])
+        cols = np.concatenate([current.col, keys[:, 1]])
+        data = np.concatenate([current.data, np.fromiter(self._pending.values(), np.float64, len(self._pending))])
+        self._matrix = csr_matrix((data, (rows, cols)), shape=shape)
+        self._matrix.sort_indices()
+        self._pending = {}
+
+    def rate(self, user_id, title, rating):
+        """Record `rating` of `title` by `user_id`, replacing an earlier one."""
+        with self._lock:
+            row, col = self._user_row(user_id), self._course_col(title)
+            position = self._position(row, col)
+            if position is None:
+                self._pending[(row, col)] = float(rating)
+            else:
+                self._matrix.data[position] = rating
+            self.version += 1
+        for listener in self.listeners:
+            listener(row, col)
+        return row, col
+
+    def _position(self, row, col):
+        # Index of (row, col) in the CSR data array, if it is stored there
+        if row >= self._matrix.shape[0] or col >= self._matrix.shape[1]:
+            return None
+        start, end = self._matrix.indptr[row], self._matrix.indptr[row + 1]
+        i = start + np.searchsorted(self._matrix.indices[start:end], col)
+        return i if i < end and self._matrix.indices[i] == col else None
+
+    def snapshot(self):
+        """A copy of the matrix with the user and course lists it is indexed by."""
+        with self._lock:
+            return self.matrix.copy(), list(self.users), list(self.titles)
+
+    def has_user(self, user_id):
+        return user_id in self.user_index
+
+    def user_ratings(self, user_id):
+        """(course columns, ratings) of everything `user_id` has rated."""
+        row = self.matrix.getrow(self.user_index[user_id])
+        return row.indices, row.data
+
+    def rated_titles(self, user_id):
+        return {self.titles[c] for c in self.user_ratings(user_id)[0]}
+
+    @property
+    def num_ratings(self):
+        return self.matrix.nnz
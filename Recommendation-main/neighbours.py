@@ -0,0 +1,233 @@
+import argparse
+import logging
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.preprocessing import normalize
+from interactions import atomic_write, ratings_fingerprint
+
+def top_k_neighbours(vectors, rows, k):
+    """Top-k cosine neighbours of `rows` among the rows of `vectors`.
+
+    `vectors` is L2-normalized CSR. Returns (ids, similarities), one row per
+    entry of `rows`, best first, padded with -1 / 0 where fewer than k rows
+    have a positive similarity. A row is never its own neighbour.
+    """
+    similarities = (vectors[rows] @ vectors.T).toarray()
+    similarities[np.arange(len(rows)), rows] = 0
+    k = min(k, similarities.shape[1])
+    ids = np.full((len(rows), k), -1, dtype=np.int64)
+    sims = np.zeros((len(rows), k))
+    if k == 0:
+        return ids, sims
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    top_sims = np.take_along_axis(similarities, top, axis=1)
+    order = np.argsort(-top_sims, axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    top_sims = np.take_along_axis(top_sims, order, axis=1)
+    keep = top_sims > 0
+    ids[keep] = top[keep]
+    sims[keep] = top_sims[keep]
+    return ids, sims
+
+_worker_vectors = None
+
+def _init_worker(vectors):
+    global _worker_vectors
+    _worker_vectors = vectors
+
+def _chunk_neighbours(args):
+    rows, k = args
+    return top_k_neighbours(_worker_vectors, rows, k)
+
+def build_neighbours(vectors, k, rows=None, chunk_size=256, workers=1):
+    """top_k_neighbours of `rows` (default: all), in chunks spread over `workers` processes."""
+    rows = np.arange(vectors.shape[0]) if rows is None else np.asarray(rows)
+    chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(vectors,)) as pool:
+            results = list(pool.map(_chunk_neighbours, [(rows, k) for rows in chunks]))
+    else:
+        results = [top_k_neighbours(vectors, rows, k) for rows in chunks]
+    if not results:
+        return np.zeros((0, k), dtype=np.int64), np.zeros((0, k))
+    return np.vstack([ids for ids, _ in results]), np.vstack([sims for _, sims in results])
+
+class NeighbourIndex:
+    """Top-k most similar courses per course, or users per user with
+    axis='users' (cosine over the rating vectors).
+
+    Stored as two n x k arrays, neighbour ids and similarities, so the index
+    holds k entries per course (user) instead of the full similarity matrix.
+    Built in parallel chunks, saved to `path`, and kept current through the
+    store's listeners: a new rating marks its course (user) dirty, and
+    `refresh` recomputes the rows of the dirty ones and of every course (user)
+    sharing a user (course) with them, the only similarities that rating can
+    change. `start` runs that refresh off the request path, every
+    `refresh_interval` seconds, and saves the result at most every
+    `save_interval` seconds; lookups read whichever (ids, sims) pair was
+    published last.
+    """
+
+    def __init__(self, store, k=10, path=None, chunk_size=256, workers=1, axis='courses', track=True,
+                 refresh_interval=5.0, save_interval=600.0):
+        if axis not in ('courses', 'users'):
+            raise ValueError(f"axis must be 'courses' or 'users', not {axis!r}")
+        self.store = store
+        self.axis = axis
+        self.k = k
+        self.path = path
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.refresh_interval = refresh_interval
+        self.save_interval = save_interval
+        # (ids, sims), replaced as a whole so a lookup never pairs the ids of
+        # one refresh with the similarities of another
+        self._state = (np.zeros((0, k), dtype=np.int64), np.zeros((0, k)))
+        self.dirty = set()
+        # (state, matrix, users, titles) of a refresh not saved yet
+        self._unsaved = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        # A one-off index (track=False) is not refreshed, so it does not listen
+        if track:
+            store.listeners.append(self._on_rating)
+
+    @property
+    def ids(self):
+        return self._state[0]
+
+    @property
+    def sims(self):
+        return self._state[1]
+
+    def _on_rating(self, user_row, course_col):
+        with self._lock:
+            self.dirty.add(course_col if self.axis == 'courses' else user_row)
+
+    def ratings(self, matrix):
+        # One row per course over the users who rated it, or per user
+        return matrix.T.tocsr() if self.axis == 'courses' else matrix
+
+    def vectors(self, matrix):
+        return normalize(self.ratings(matrix))
+
+    def build(self):
+        with self._refresh_lock:
+            with self._lock:
+                self.dirty = set()
+            matrix, users, titles = self.store.snapshot()
+            self._state = build_neighbours(self.vectors(matrix), self.k, None, self.chunk_size, self.workers)
+            self._unsaved = None
+            self.save(ratings_fingerprint(matrix, users, titles))
+
+    def load_or_build(self):
+        """Load `path` if it was built from the current ratings, else rebuild it."""
+        if self.path and os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('axis', 'courses') == self.axis and data['k'] == self.k and data['fingerprint'] == ratings_fingerprint(*self.store.snapshot()):
+                self._state = (data['ids'], data['sims'])
+                return
+        self.build()
+
+    def save(self, fingerprint, state=None):
+        if not self.path:
+            return
+        ids, sims = state or self._state
+        data = {'axis': self.axis, 'k': self.k, 'ids': ids, 'sims': sims, 'fingerprint': fingerprint}
+        atomic_write(self.path, lambda f: pickle.dump(data, f))
+
+    def refresh(self):
+        """Recompute the rows a rating since the last refresh can have changed."""
+        if not self.dirty:
+            return 0
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        with self._lock:
+            dirty, self.dirty = self.dirty, set()
+        if not dirty:
+            return 0
+        matrix, users, titles = self.store.snapshot()
+        ratings = self.ratings(matrix)
+        vectors = normalize(ratings)
+        dirty = np.fromiter(dirty, dtype=np.int64)
+        # Courses co-rated with a dirty course by at least one user (users
+        # who rated a course a dirty user rated)
+        shared = np.unique(ratings[dirty].indices)
+        affected = np.union1d(dirty, ratings.T.tocsr()[shared].indices)
+        current_ids, current_sims = self._state
+        ids, sims = np.full((vectors.shape[0], self.k), -1, dtype=np.int64), np.zeros((vectors.shape[0], self.k))
+        # New courses get rows; unaffected rows are carried over
+        ids[:len(current_ids)], sims[:len(current_sims)] = current_ids, current_sims
+        ids[affected], sims[affected] = build_neighbours(vectors, self.k, affected, self.chunk_size)
+        self._state = (ids, sims)
+        # Fingerprinted and saved later (see start), not once per refresh
+        self._unsaved = (self._state, matrix, users, titles)
+        return len(affected)
+
+    def save_unsaved(self):
+        """Save the last refresh, if it has not been saved yet."""
+        with self._refresh_lock:
+            unsaved, self._unsaved = self._unsaved, None
+        if unsaved is not None:
+            state, matrix, users, titles = unsaved
+            self.save(ratings_fingerprint(matrix, users, titles), state)
+
+    def start(self):
+        """Refresh and save on a daemon thread (see the class docstring)."""
+        def run():
+            last_save = time.monotonic()
+            while True:
+                time.sleep(self.refresh_interval)
+                try:
+                    self.refresh()
+                    if time.monotonic() - last_save >= self.save_interval:
+                        self.save_unsaved()
+                        last_save = time.monotonic()
+                except Exception:
+                    logging.exception("Neighbour index refresh failed")
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=run, name=f"{self.axis[:-1]}-neighbours", daemon=True)
+            self._thread.start()
+
+    def neighbours(self, rows):
+        """(ids, similarities) of the top-k neighbours of each of `rows`, as of
+        the last refresh: rows added since then have none yet (-1 / 0)."""
+        ids, sims = self._state
+        rows = np.asarray(rows, dtype=np.int64)
+        known = rows < len(ids)
+        found_ids = np.full((len(rows), ids.shape[1]), -1, dtype=np.int64)
+        found_sims = np.zeros((len(rows), sims.shape[1]))
+        found_ids[known], found_sims[known] = ids[rows[known]], sims[rows[known]]
+        return found_ids, found_sims
+
+def main(argv=None):
+    from recommendation_engine import load_interaction_store
+    parser = argparse.ArgumentParser(description="Build a course or user neighbour index offline")
+    parser.add_argument('--axis', choices=['courses', 'users'], default='courses')
+    parser.add_argument('--out', default=None, help="default: course_neighbours.pkl / user_neighbours.pkl")
+    parser.add_argument('--ratings', default=os.environ.get('RATINGS_PATH', 'ratings.pkl'),
+                        help="the ratings app.py serves (created if missing); the index is only "
+                             "reused at startup if it was built from the same ratings")
+    parser.add_argument('--k', type=int, default=None, help="default: 10 courses / 5 users, as in app.py")
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+    out = args.out or f"{args.axis[:-1]}_neighbours.pkl"
+    k = args.k or (10 if args.axis == 'courses' else 5)
+
+    store = load_interaction_store(args.ratings)
+    index = NeighbourIndex(store, k, out, args.chunk_size, args.workers, args.axis, track=False)
+    index.build()
+    print(f"{len(index.ids)} {args.axis}, top {k} neighbours each, saved to {out}")
+
+if __name__ == "__main__":
+    main()
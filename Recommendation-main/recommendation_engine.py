@@ -1,15 +1,21 @@
+import logging
+import os
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import NMF
+from factors import train_factors
+from interactions import InteractionStore
+from neighbours import NeighbourIndex
+
+def load_courses():
+    """Load the courses data, with only the columns we need."""
+    courses_df = pd.read_csv('coursera_courses_detailed.csv')
+    return courses_df[['Title', 'Provider', 'Skills', 'Rating', 'Course Link']]
 
 def load_data():
     """Load the courses data and create a synthetic ratings dataset."""
-    # Load the courses data
-    courses_df = pd.read_csv('coursera_courses_detailed.csv')
-    
-    # Select only the columns we need
-    courses_df = courses_df[['Title', 'Provider', 'Skills', 'Rating', 'Course Link']]
+    courses_df = load_courses()
     
     # Create a synthetic ratings dataset
     num_users = 100
@@ -30,110 +36,166 @@ def load_data():
     ratings_df = pd.DataFrame(ratings)
     return courses_df, ratings_df
 
-def get_user_ratings(user_id, ratings_df):
-    """Get the courses a specific user has rated."""
-    return ratings_df[ratings_df['UserID'] == user_id]
-
-def user_based_recommendations(user_id, courses_df, ratings_df, n_recommendations=10, k=5):
-    """User-based collaborative filtering recommendations."""
-    user_course_matrix = ratings_df.pivot_table(index='UserID', columns='Title', values='Rating').fillna(0)
-    user_similarity = cosine_similarity(user_course_matrix)
-    user_similarity_df = pd.DataFrame(
-        user_similarity,
-        index=user_course_matrix.index,
-        columns=user_course_matrix.index
-    )
-    
-    similar_users = user_similarity_df[user_id].sort_values(ascending=False)[1:k+1].index
-    target_user_rated = set(get_user_ratings(user_id, ratings_df)['Title'])
-    similar_users_ratings = ratings_df[
-        (ratings_df['UserID'].isin(similar_users)) & 
-        (~ratings_df['Title'].isin(target_user_rated))
-    ]
-    
-    recommendations = []
-    for course in similar_users_ratings['Title'].unique():
-        course_ratings = similar_users_ratings[similar_users_ratings['Title'] == course]
-        similarities = [user_similarity_df.loc[user_id, u] for u in course_ratings['UserID']]
-        weighted_avg = np.dot(course_ratings['Rating'], similarities) / np.sum(similarities)
-        recommendations.append({'Title': course, 'PredictedRating': weighted_avg})
-    
-    if not recommendations:
-        return pd.DataFrame(columns=['Title', 'Provider', 'Skills', 'Rating', 'Course Link'])
-    
-    rec_df = pd.DataFrame(recommendations).sort_values('PredictedRating', ascending=False)
+def build_interaction_store(ratings_df):
+    """Users x courses CSR matrix shared by the recommenders (see interactions.py)."""
+    return InteractionStore.from_ratings(ratings_df)
+
+def load_interaction_store(path=None):
+    """The store saved at `path`, else one over a fresh synthetic ratings
+    dataset, saved there so later starts and offline builds see the same ratings."""
+    if path and os.path.exists(path):
+        return InteractionStore.load(path)
+    _, ratings_df = load_data()
+    store = build_interaction_store(ratings_df)
+    if path:
+        store.save(path)
+    return store
+
+def course_details(scores, courses_df, score_column):
+    """Courses ranked by `scores` (Title -> score), with the catalogue columns."""
+    rec_df = pd.DataFrame({'Title': list(scores), score_column: list(scores.values())})
+    rec_df = rec_df.sort_values(score_column, ascending=False)
     final_recs = pd.merge(rec_df, courses_df, on='Title', how='left')
-    final_recs = final_recs[['Title', 'Provider', 'Skills', 'PredictedRating', 'Course Link']]
+    return final_recs[['Title', 'Provider', 'Skills', score_column, 'Course Link']]
+
+def empty_recommendations():
+    return pd.DataFrame(columns=['Title', 'Provider', 'Skills', 'Rating', 'Course Link'])
+
+def user_based_recommendations(user_id, courses_df, store, n_recommendations=10, k=5, user_neighbours=None):
+    """User-based collaborative filtering recommendations.
+
+    `user_neighbours` is a NeighbourIndex(axis='users') of the most similar
+    users per user (see neighbours.py); without one, it is built on the spot.
+    """
+    if user_neighbours is None:
+        user_neighbours = NeighbourIndex(store, k, axis='users', track=False)
+        user_neighbours.build()
+    
+    ids, similarities = user_neighbours.neighbours([store.user_index[user_id]])
+    keep = ids[0, :k] >= 0
+    similar_users, similarities = ids[0, :k][keep], similarities[0, :k][keep]
+    # Read after the lookup: the store only grows, so this matrix has a row
+    # for every user the index knew of
+    matrix = store.matrix
+    
+    # Similarity-weighted average over the similar users who rated each
+    # course: two sparse matrix-vector products over their rows
+    neighbour_ratings = matrix[similar_users]
+    weighted_sum = neighbour_ratings.T @ similarities
+    similarity_sum = (neighbour_ratings != 0).T @ similarities
+    rated_by_user = store.user_ratings(user_id)[0]
+    candidates = np.setdiff1d(np.unique(neighbour_ratings.indices), rated_by_user)
+    candidates = candidates[similarity_sum[candidates] > 0]
+    
+    if len(candidates) == 0:
+        return empty_recommendations()
+    
+    scores = dict(zip([store.titles[c] for c in candidates], weighted_sum[candidates] / similarity_sum[candidates]))
+    final_recs = course_details(scores, courses_df, 'PredictedRating')
     return final_recs.rename(columns={'PredictedRating': 'Rating'}).head(n_recommendations)
 
-def model_based_recommendations(user_id, courses_df, ratings_df, n_recommendations=10):
-    """Matrix factorization recommendations using NMF."""
-    user_course_matrix = ratings_df.pivot_table(
-        index='UserID', 
-        columns='Title', 
-        values='Rating'
-    ).fillna(0)
-    
-    model = NMF(n_components=20, init='random', random_state=42)
-    W = model.fit_transform(user_course_matrix)
-    H = model.components_
-    reconstructed_matrix = np.dot(W, H)
-    
-    user_idx = user_course_matrix.index.get_loc(user_id)
-    user_predicted_ratings = reconstructed_matrix[user_idx]
-    
-    recommendations = pd.DataFrame({
-        'Title': user_course_matrix.columns,
-        'PredictedRating': user_predicted_ratings
-    })
-    
-    rated_courses = set(get_user_ratings(user_id, ratings_df)['Title'])
-    recommendations = recommendations[~recommendations['Title'].isin(rated_courses)]
-    recommendations = recommendations.sort_values('PredictedRating', ascending=False)
-    
-    final_recs = pd.merge(recommendations, courses_df, on='Title', how='left').head(n_recommendations)
-    return final_recs[['Title', 'Provider', 'Skills', 'PredictedRating', 'Course Link']].rename(columns={'PredictedRating': 'Rating'})
-
-def item_based_recommendations(user_id, courses_df, ratings_df, n_recommendations=10):
-    """Item-based collaborative filtering recommendations."""
-    user_course_matrix = ratings_df.pivot_table(index='UserID', columns='Title', values='Rating').fillna(0)
-    course_similarity = cosine_similarity(user_course_matrix.T)
-    course_similarity_df = pd.DataFrame(
-        course_similarity,
-        index=user_course_matrix.columns,
-        columns=user_course_matrix.columns
-    )
-    
-    user_ratings = get_user_ratings(user_id, ratings_df)
-    liked_courses = user_ratings[user_ratings['Rating'] >= 4]['Title']
+def model_based_recommendations(user_id, courses_df, store, n_recommendations=10, factors=None):
+    """Matrix factorization recommendations using NMF.
+
+    `factors` is a FactorTrainer holding a model trained off the request path
+    (see factors.py); without one, NMF is fitted on the spot.
+    """
+    if factors is None:
+        model = train_factors(store)
+        user_vector = model.W[model.user_index[user_id]]
+    else:
+        model, user_vector = factors.user_vector(user_id)
+    user_predicted_ratings = user_vector @ model.H
+    
+    rated_courses = store.rated_titles(user_id)
+    scores = {
+        title: user_predicted_ratings[c]
+        for c, title in enumerate(model.titles) if title not in rated_courses
+    }
+    
+    final_recs = course_details(scores, courses_df, 'PredictedRating').head(n_recommendations)
+    return final_recs.rename(columns={'PredictedRating': 'Rating'})
+
+def item_based_recommendations(user_id, courses_df, store, n_recommendations=10, course_neighbours=None):
+    """Item-based collaborative filtering recommendations.
+
+    `course_neighbours` is a NeighbourIndex of the most similar courses per
+    course (see neighbours.py); without one, it is built on the spot.
+    """
+    if course_neighbours is None:
+        course_neighbours = NeighbourIndex(store, track=False)
+        course_neighbours.build()
+    
+    rated_courses, ratings = store.user_ratings(user_id)
+    liked_courses = rated_courses[ratings >= 4]
     if len(liked_courses) == 0:
-        liked_courses = user_ratings['Title']
+        liked_courses = rated_courses
     
-    recommendations = []
-    for course in liked_courses:
-        similar_courses = course_similarity_df[course].sort_values(ascending=False)[1:11]
-        for similar_course, similarity in similar_courses.items():
-            if similar_course not in user_ratings['Title'].values:
-                recommendations.append({'Title': similar_course, 'SimilarityScore': similarity})
+    # Best similarity to any liked course, over their top-k neighbours
+    ids, sims = course_neighbours.neighbours(liked_courses)
+    ids, sims = ids.ravel(), sims.ravel()
+    keep = (ids >= 0) & ~np.isin(ids, rated_courses)
+    best = np.zeros(len(store.titles))
+    np.maximum.at(best, ids[keep], sims[keep])
+    candidates = np.unique(ids[keep])
     
-    if not recommendations:
-        return pd.DataFrame(columns=['Title', 'Provider', 'Skills', 'Rating', 'Course Link'])
+    if len(candidates) == 0:
+        return empty_recommendations()
     
-    rec_df = pd.DataFrame(recommendations)
-    rec_df = rec_df.groupby('Title')['SimilarityScore'].max().reset_index()
-    rec_df = rec_df.sort_values('SimilarityScore', ascending=False)
-    
-    final_recs = pd.merge(rec_df, courses_df, on='Title', how='left')
-    final_recs = final_recs[['Title', 'Provider', 'Skills', 'SimilarityScore', 'Course Link']]
+    scores = {store.titles[c]: best[c] for c in candidates}
+    final_recs = course_details(scores, courses_df, 'SimilarityScore')
     return final_recs.rename(columns={'SimilarityScore': 'Rating'}).head(n_recommendations)
 
-def hybrid_recommendations(user_id, courses_df, ratings_df, n_recommendations=10):
-    """Combine recommendations from all three methods."""
-    user_recs = user_based_recommendations(user_id, courses_df, ratings_df, n_recommendations*2)
-    model_recs = model_based_recommendations(user_id, courses_df, ratings_df, n_recommendations*2)
-    item_recs = item_based_recommendations(user_id, courses_df, ratings_df, n_recommendations*2)
-    
-    combined = pd.concat([user_recs, model_recs, item_recs]).drop_duplicates('Title')
+def run_strategies(strategies, executor=None, deadlines=None):
+    """Run {name: fn} and return {name: result} for those that finished.
+
+    With an executor the strategies run concurrently and each must finish
+    within its `deadlines[name]` seconds of the start (no entry: no limit);
+    one that is late or raises is left out. Threads cannot be interrupted,
+    so a late strategy still runs to completion in the pool, unused.
+    Without an executor they run one after another, with no deadlines.
+    """
+    if executor is None:
+        return {name: fn() for name, fn in strategies.items()}
+    
+    deadlines = deadlines or {}
+    start = time.monotonic()
+    futures = {name: executor.submit(fn) for name, fn in strategies.items()}
+    results = {}
+    for name, future in futures.items():
+        deadline = deadlines.get(name)
+        timeout = None if deadline is None else max(deadline - (time.monotonic() - start), 0)
+        try:
+            results[name] = future.result(timeout)
+        except FutureTimeout:
+            logging.warning(f"{name} recommender missed its {deadline}s deadline")
+        except Exception as e:
+            logging.error(f"{name} recommender failed: {e}")
+    return results
+
+def hybrid_recommendations(user_id, courses_df, store, n_recommendations=10, factors=None, course_neighbours=None,
+                           user_neighbours=None, executor=None, deadlines=None):
+    """Combine recommendations from all three methods.
+
+    The strategies ('user', 'model', 'item') run through `run_strategies`, so
+    given an executor they run concurrently and those missing their deadline
+    are left out. The names of the ones that contributed are in
+    `result.attrs['recommenders']`.
+    """
+    results = run_strategies({
+        'user': lambda: user_based_recommendations(user_id, courses_df, store, n_recommendations*2,
+                                                   user_neighbours=user_neighbours),
+        'model': lambda: model_based_recommendations(user_id, courses_df, store, n_recommendations*2, factors),
+        'item': lambda: item_based_recommendations(user_id, courses_df, store, n_recommendations*2,
+                                                   course_neighbours),
+    }, executor, deadlines)
+    
+    if not results:
+        final_recs = empty_recommendations()
+        final_recs.attrs['recommenders'] = []
+        return final_recs
+    
+    combined = pd.concat(list(results.values())).drop_duplicates('Title')
     
     # Normalize scores
     for col in ['Rating', 'PredictedRating', 'SimilarityScore']:
@@ -151,20 +213,23 @@ def hybrid_recommendations(user_id, courses_df, ratings_df, n_recommendations=10
     
     final_recs = combined.sort_values('CombinedScore', ascending=False)
     final_recs = final_recs[['Title', 'Provider', 'Skills', 'CombinedScore', 'Course Link']]
-    return final_recs.rename(columns={'CombinedScore': 'Rating'}).head(n_recommendations)
+    final_recs = final_recs.rename(columns={'CombinedScore': 'Rating'}).head(n_recommendations)
+    final_recs.attrs['recommenders'] = list(results)
+    return final_recs
 
 if __name__ == "__main__":
     courses_df, ratings_df = load_data()
+    store = build_interaction_store(ratings_df)
     user_id = 1
     
     print("\nUser-based recommendations:")
-    print(user_based_recommendations(user_id, courses_df, ratings_df))
+    print(user_based_recommendations(user_id, courses_df, store))
     
     print("\nModel-based recommendations:")
-    print(model_based_recommendations(user_id, courses_df, ratings_df))
+    print(model_based_recommendations(user_id, courses_df, store))
     
     print("\nItem-based recommendations:")
-    print(item_based_recommendations(user_id, courses_df, ratings_df))
+    print(item_based_recommendations(user_id, courses_df, store))
     
     print("\nHybrid recommendations:")
-    print(hybrid_recommendations(user_id, courses_df, ratings_df))
\ No newline at end of file
+    print(hybrid_recommendations(user_id, courses_df, store))
\ No newline at end of file